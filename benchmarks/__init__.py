@@ -0,0 +1 @@
+from .detector_bench import run_benchmarks, compare_with_baseline
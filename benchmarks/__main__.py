@@ -0,0 +1,54 @@
+"""
+Запуск бенчмарка детекторов
+
+    python -m benchmarks                 # замер и сравнение с базой
+    python -m benchmarks --save          # замер и сохранение новой базы
+"""
+
+import argparse
+import json
+import os
+import sys
+from benchmarks.detector_bench import run_benchmarks, compare_with_baseline
+
+
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк детекторов цвета")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Файл базы результатов")
+    parser.add_argument("--save", action="store_true", help="Сохранить результаты как новую базу")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Допустимое замедление относительно базы (0.15 = 15%%)")
+    parser.add_argument("--rounds", type=int, default=7, help="Количество раундов замера")
+    args = parser.parse_args()
+
+    report = run_benchmarks(rounds=args.rounds)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"\nБаза сохранена: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nБаза не найдена ({args.baseline}) — запустите с --save")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare_with_baseline(report, baseline, tolerance=args.tolerance)
+    if regressions:
+        print("\n=== РЕГРЕССИИ ===")
+        for line in regressions:
+            print(line)
+        return 1
+
+    print("\nРегрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Микро-бенчмарк детекторов на реалистичных размерах кадров
+
+Для каждого детектора и размера области измеряется время detect()
+(нс/кадр), пропускная способность (пикселей/с) и пиковый объём памяти,
+выделяемой за один вызов (по tracemalloc).
+"""
+
+import json
+import platform
+import time
+import tracemalloc
+import numpy as np
+import config as app_config
+from detectors.universal_detector import UniversalDetector
+from detectors.soft_pink_detector import SoftPinkDetector
+from detectors.blue_detector import BlueDetector
+from detectors.compiled_range_detector import CompiledRangeDetector
+from detectors.color_space_detector import ColorSpaceLutDetector
+from detectors.color_distance_detector import ColorDistanceDetector
+from detectors.strip_edge_detector import StripEdgeDetector
+from detectors.detector_bank import DetectorBank
+from utils.color_utils import calculate_average_color
+
+
+# Дополнительные крупные области (H, W)
+LARGE_SHAPES = [(100, 100), (300, 300), (600, 800)]
+
+# Число разных кадров, по которым идёт цикл (чтобы не мерить один кэш)
+FRAME_POOL_SIZE = 16
+
+
+def _load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_frame_shapes(detector_config_file="detector_config.json",
+                      multi_config_file="multi_detector_config.json"):
+    """
+    Размеры областей из конфигов + крупные области
+
+    Returns:
+        list: Уникальные (H, W) в порядке появления
+    """
+    shapes = []
+    for detector in _load_json(multi_config_file).get("detectors", []):
+        shapes.append((detector["height"], detector["width"]))
+
+    detector_config = _load_json(detector_config_file)
+    if detector_config:
+        shapes.append((
+            detector_config.get("capture_height", app_config.CAPTURE_HEIGHT),
+            detector_config.get("capture_width", app_config.CAPTURE_WIDTH),
+        ))
+
+    shapes.extend(LARGE_SHAPES)
+    return list(dict.fromkeys(shapes))
+
+
+def create_detectors(detector_config_file="detector_config.json",
+                     multi_config_file="multi_detector_config.json"):
+    """
+    Все детекторы из detectors/ с рабочими настройками
+
+    Returns:
+        dict: Название -> функция detect(frame)
+    """
+    detector_config = _load_json(detector_config_file)
+    multi_configs = _load_json(multi_config_file).get("detectors", [])
+
+    universal = UniversalDetector(dict(detector_config, count_threshold=False, sample_stride=1))
+    universal_count = UniversalDetector(dict(detector_config, count_threshold=True))
+    universal_sampled = UniversalDetector(dict(detector_config, count_threshold=False, sample_stride=4))
+    compiled = CompiledRangeDetector(detector_config)
+    color_space = ColorSpaceLutDetector(detector_config)
+    distance = ColorDistanceDetector(detector_config)
+    strip_edge = StripEdgeDetector(detector_config)
+    soft_pink = SoftPinkDetector(dict(detector_config, sample_stride=1))
+    blue = BlueDetector(app_config.BLUE_DETECTION)
+
+    def blue_detect(frame):
+        # Так же, как в цикле захвата: простой детектор получает средний цвет
+        r, g, b = calculate_average_color(frame)
+        return blue.detect(r, g, b)
+
+    detectors = {
+        "UniversalDetector": lambda frame: universal.detect(0, 0, 0, frame=frame),
+        "UniversalDetector[count]": lambda frame: universal_count.detect(0, 0, 0, frame=frame),
+        "UniversalDetector[sampled]": lambda frame: universal_sampled.detect(0, 0, 0, frame=frame),
+        "CompiledRangeDetector": lambda frame: compiled.detect(0, 0, 0, frame=frame),
+        "ColorSpaceLutDetector": lambda frame: color_space.detect(0, 0, 0, frame=frame),
+        "ColorDistanceDetector": lambda frame: distance.detect(0, 0, 0, frame=frame),
+        "StripEdgeDetector": lambda frame: strip_edge.detect(0, 0, 0, frame=frame),
+        "SoftPinkDetector": lambda frame: soft_pink.detect(0, 0, 0, frame=frame),
+        "BlueDetector": blue_detect,
+    }
+
+    # Все детекторы multi-режима одним проходом
+    if multi_configs:
+        bank = DetectorBank(multi_configs)
+        detectors[f"DetectorBank[{bank.size}]"] = lambda frame: bank.evaluate(frame)
+
+    return detectors
+
+
+def make_frames(shape, color=(210, 225, 235), seed=0):
+    """
+    Набор кадров: шумный тёмный фон и полоса искомого цвета на части кадров
+
+    Args:
+        shape: (H, W)
+        color: RGB цвет полосы (по умолчанию внутри диапазона detector_config.json)
+    """
+    rng = np.random.default_rng(seed)
+    height, width = shape
+    frames = rng.integers(0, 60, size=(FRAME_POOL_SIZE, height, width, 3), dtype=np.uint8)
+    band = max(1, height // 8)
+    for i in range(0, FRAME_POOL_SIZE, 2):
+        top = (i * height) // FRAME_POOL_SIZE
+        frames[i, top:top + band] = color
+    return frames
+
+
+def _calibrate_iterations(detect, frames, target_time=0.05):
+    """Подобрать число вызовов на раунд (~target_time секунд)"""
+    iterations = 1
+    while True:
+        start = time.perf_counter_ns()
+        for i in range(iterations):
+            detect(frames[i % FRAME_POOL_SIZE])
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= target_time * 1e9 or iterations >= 1 << 20:
+            return iterations
+        iterations *= 2
+
+
+def _measure_allocations(detect, frames, calls=50):
+    """Пиковый объём памяти (байт), выделяемый за один вызов"""
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        for i in range(calls):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            detect(frames[i % FRAME_POOL_SIZE])
+            peak_total += tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return peak_total // calls
+
+
+def benchmark_detector(detect, shape, rounds=7):
+    """
+    Замер одного детектора на одном размере кадра
+
+    Returns:
+        dict: ns_per_frame (медиана раундов), pixels_per_s, alloc_bytes
+    """
+    frames = make_frames(shape)
+    for frame in frames:
+        detect(frame)  # Прогрев (кэши, ленивые буферы детектора)
+
+    iterations = _calibrate_iterations(detect, frames)
+    samples = []
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(rounds):
+        start = perf_counter_ns()
+        for i in range(iterations):
+            detect(frames[i % FRAME_POOL_SIZE])
+        samples.append((perf_counter_ns() - start) / iterations)
+
+    ns_per_frame = float(np.median(samples))
+    pixels = shape[0] * shape[1]
+    return {
+        "ns_per_frame": round(ns_per_frame, 1),
+        "pixels_per_s": round(pixels * 1e9 / ns_per_frame) if ns_per_frame > 0 else 0,
+        "alloc_bytes": _measure_allocations(detect, frames),
+    }
+
+
+def run_benchmarks(shapes=None, detectors=None, rounds=7, verbose=True):
+    """
+    Прогнать все детекторы по всем размерам
+
+    Returns:
+        dict: {"meta": ..., "results": {"Детектор@HxW": {...}}}
+    """
+    if shapes is None:
+        shapes = load_frame_shapes()
+    if detectors is None:
+        detectors = create_detectors()
+
+    results = {}
+    for name, detect in detectors.items():
+        for shape in shapes:
+            key = f"{name}@{shape[0]}x{shape[1]}"
+            results[key] = benchmark_detector(detect, shape, rounds=rounds)
+            if verbose:
+                r = results[key]
+                print(f"{key:<32} {r['ns_per_frame']:>12.0f} нс/кадр "
+                      f"{r['pixels_per_s'] / 1e6:>10.1f} Мпикс/с {r['alloc_bytes']:>10} Б/вызов")
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare_with_baseline(report, baseline, tolerance=0.15):
+    """
+    Сравнить результаты с сохранённой базой
+
+    Args:
+        report: Результат run_benchmarks()
+        baseline: Ранее сохранённый результат run_benchmarks()
+        tolerance: Допустимое замедление (0.15 = +15%)
+
+    Returns:
+        list: Строки с описанием регрессий (пустой список — регрессий нет)
+    """
+    regressions = []
+    for key, result in report["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            continue
+        if result["ns_per_frame"] > base["ns_per_frame"] * (1 + tolerance):
+            slowdown = result["ns_per_frame"] / base["ns_per_frame"] - 1
+            regressions.append(
+                f"{key}: {base['ns_per_frame']:.0f} -> {result['ns_per_frame']:.0f} нс/кадр (+{slowdown * 100:.0f}%)"
+            )
+        if result["alloc_bytes"] > base["alloc_bytes"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: память {base['alloc_bytes']} -> {result['alloc_bytes']} Б/вызов"
+            )
+    return regressions
@@ -1 +1,2 @@
 from .screen_capture import ScreenCapture
+from .frame_source import FrameSource, create_frame_source
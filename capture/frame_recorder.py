@@ -0,0 +1,154 @@
+"""
+Запись кадров в кольцевой memory-mapped файл и их воспроизведение
+
+Формат записи (path — префикс без расширения):
+    path.json    — метаданные (форма кадра, ёмкость кольца)
+    path.frames  — uint8 массив (capacity, H, W, 3)
+    path.index   — номер кадра и время захвата для каждого слота
+"""
+
+import json
+import os
+import time
+import numpy as np
+
+
+INDEX_DTYPE = np.dtype([('seq', '<i8'), ('timestamp', '<f8')])
+
+
+def is_recording(path):
+    """Проверить, что по префиксу path лежит запись FrameRecorder"""
+    return os.path.exists(path + ".json") and os.path.exists(path + ".frames")
+
+
+class FrameRecorder:
+    """Запись кадров одного региона в заранее выделенный кольцевой файл"""
+
+    def __init__(self, path, shape, capacity=4096):
+        """
+        Args:
+            path: Префикс файлов записи
+            shape: Форма кадра (H, W, 3)
+            capacity: Количество кадров в кольце (старые перезаписываются)
+        """
+        self.path = path
+        self.shape = tuple(shape)
+        self.capacity = capacity
+        self.seq = 0
+        self.skipped = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump({"shape": list(self.shape), "capacity": capacity}, f)
+
+        self._frames = np.memmap(path + ".frames", dtype=np.uint8, mode='w+',
+                                 shape=(capacity,) + self.shape)
+        self._index = np.memmap(path + ".index", dtype=INDEX_DTYPE, mode='w+',
+                                shape=(capacity,))
+        self._index['seq'] = -1
+
+    def write(self, frame, timestamp):
+        """
+        Записать кадр
+
+        Returns:
+            bool: False, если форма кадра не совпадает с формой записи
+        """
+        if frame.shape != self.shape:
+            self.skipped += 1
+            return False
+        slot = self.seq % self.capacity
+        np.copyto(self._frames[slot], frame)
+        self._index[slot] = (self.seq, timestamp)
+        self.seq += 1
+        return True
+
+    def close(self):
+        """Сбросить данные на диск"""
+        if self._frames is None:
+            return
+        self._frames.flush()
+        self._index.flush()
+        self._frames = None
+        self._index = None
+        print(f"[Recorder] {self.path}: записано кадров {self.seq} "
+              f"(в файле {min(self.seq, self.capacity)}), пропущено {self.skipped}")
+
+
+class FrameReplayer:
+    """Чтение записи FrameRecorder без копирования кадров (memory map)"""
+
+    def __init__(self, path):
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.shape = tuple(meta["shape"])
+        self.capacity = meta["capacity"]
+
+        self._frames = np.memmap(path + ".frames", dtype=np.uint8, mode='r',
+                                 shape=(self.capacity,) + self.shape)
+        index = np.memmap(path + ".index", dtype=INDEX_DTYPE, mode='r',
+                          shape=(self.capacity,))
+
+        # Слоты кольца в хронологическом порядке
+        valid = np.flatnonzero(index['seq'] >= 0)
+        self._order = valid[np.argsort(index['seq'][valid])]
+        self.timestamps = np.array(index['timestamp'][self._order])
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, i):
+        return self._frames[self._order[i]]
+
+    def __iter__(self):
+        for i in range(len(self._order)):
+            yield self._frames[self._order[i]], self.timestamps[i]
+
+    def replay(self, detector, realtime=False, collect=False):
+        """
+        Прогнать запись через детектор
+
+        Args:
+            detector: Детектор с методом detect(r, g, b, frame=...)
+            realtime: Соблюдать исходные интервалы между кадрами
+            collect: Сохранить результат каждого кадра (stats["results"])
+
+        Returns:
+            dict: Статистика прогона
+        """
+        count = len(self)
+        detections = 0
+        results = [] if collect else None
+        detect_time = 0.0
+        start = time.perf_counter()
+        perf_counter = time.perf_counter
+        detect = detector.detect
+
+        for i in range(count):
+            if realtime:
+                delay = start + (self.timestamps[i] - self.timestamps[0]) - perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            frame = self._frames[self._order[i]]
+            t0 = perf_counter()
+            detected = detect(0, 0, 0, frame=frame)
+            detect_time += perf_counter() - t0
+            if detected:
+                detections += 1
+            if collect:
+                results.append(bool(detected))
+
+        elapsed = perf_counter() - start
+        return {
+            "frames": count,
+            "detections": detections,
+            "detection_rate": detections / count if count else 0.0,
+            "elapsed": elapsed,
+            "fps": count / elapsed if elapsed > 0 else 0.0,
+            "detect_ns_per_frame": detect_time * 1e9 / count if count else 0.0,
+            "results": results,
+        }
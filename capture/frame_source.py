@@ -0,0 +1,279 @@
+"""
+Источники кадров для цикла захвата (dxcam, mss, синтетика, воспроизведение)
+
+Все источники возвращают кадры RGB (H x W x 3, uint8) и время захвата
+в секундах time.perf_counter().
+"""
+
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+from capture.frame_recorder import FrameReplayer, is_recording
+
+
+class FrameSource(ABC):
+    """Абстрактный источник кадров"""
+
+    # True — источник сам выдерживает темп (get_latest ждёт новый кадр),
+    # False — цикл захвата должен ограничивать FPS самостоятельно
+    self_paced = False
+
+    def start(self):
+        """Запуск источника"""
+        pass
+
+    def stop(self):
+        """Остановка источника"""
+        pass
+
+    @abstractmethod
+    def set_region(self, region):
+        """
+        Установить область захвата
+
+        Args:
+            region: (x1, y1, x2, y2) в координатах экрана
+        """
+        pass
+
+    @abstractmethod
+    def get_latest(self):
+        """
+        Получить последний кадр
+
+        Returns:
+            tuple: (frame или None, timestamp)
+        """
+        pass
+
+    def get_name(self):
+        """Название источника"""
+        return self.__class__.__name__
+
+
+class DxcamFrameSource(FrameSource):
+    """Источник на общем движке dxcam (один захват на монитор)"""
+
+    self_paced = True
+
+    def __init__(self, output_idx=0, target_fps=120, window_margin=0, full_output=False):
+        """
+        Args:
+            output_idx: Индекс выхода (монитора)
+            target_fps: Целевой FPS камеры
+            window_margin: Запас окна захвата вокруг регионов (пикселей) — пока
+                регион движется внутри окна, камера не перезапускается
+            full_output: Захватывать весь выход
+        """
+        # dxcam доступен только под Windows — импортируем при создании источника
+        from capture.shared_capture import get_capture_engine
+
+        self.engine = get_capture_engine(output_idx=output_idx, target_fps=target_fps,
+                                         window_margin=window_margin, full_output=full_output)
+        self._handle = None
+        self._region = None
+        self._frame_seq = -1
+
+    def start(self):
+        if self._handle is None:
+            self._handle = self.engine.register(self._region)
+
+    def stop(self):
+        if self._handle is not None:
+            self.engine.unregister(self._handle)
+            self._handle = None
+
+    def set_region(self, region):
+        self._region = region
+        if self._handle is not None:
+            self.engine.update_region(self._handle, region)
+
+    def get_latest(self):
+        if self._handle is None:
+            return None, 0.0
+        frame, self._frame_seq, timestamp = self.engine.get_frame(self._handle, self._frame_seq)
+        return frame, timestamp
+
+
+class MSSFrameSource(FrameSource):
+    """Источник на mss (без ограничений на количество экземпляров)"""
+
+    def __init__(self):
+        self._sct = None
+        self._monitor = None
+
+    def stop(self):
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+    def set_region(self, region):
+        x1, y1, x2, y2 = region
+        self._monitor = {"left": x1, "top": y1, "width": x2 - x1, "height": y2 - y1}
+
+    def get_latest(self):
+        if self._monitor is None:
+            return None, 0.0
+        # Объект mss привязан к потоку — создаём его в потоке захвата
+        if self._sct is None:
+            from mss import mss
+            self._sct = mss()
+        screenshot = self._sct.grab(self._monitor)
+        timestamp = time.perf_counter()
+        frame = np.asarray(screenshot)[:, :, 2::-1]  # BGRA -> RGB
+        return frame, timestamp
+
+
+class SyntheticFrameSource(FrameSource):
+    """
+    Синтетическая сцена на NumPy (для бенчмарков и профилирования без экрана)
+
+    Фон со слабым шумом, по которому сверху вниз периодически проходит
+    цветная полоса — как нота в вертикальной полосе детектора.
+    """
+
+    def __init__(self, color=(255, 0, 0), background=(20, 20, 30), band_height=20,
+                 period=0.5, noise=8, fps=None, seed=0):
+        """
+        Args:
+            color: RGB цвет движущейся полосы
+            background: RGB цвет фона
+            band_height: Высота полосы в пикселях
+            period: Время прохода полосы через область (сек)
+            noise: Амплитуда шума фона
+            fps: Темп выдачи кадров (None — без ограничения)
+            seed: Зерно генератора шума
+        """
+        self.color = np.array(color, dtype=np.uint8)
+        self.background = np.array(background, dtype=np.int16)
+        self.band_height = band_height
+        self.period = period
+        self.noise = noise
+        self.fps = fps
+        self.self_paced = fps is not None
+        self._rng = np.random.default_rng(seed)
+        self._shape = None
+        self._noise_frames = None
+        self._frame = None
+        self._frame_index = 0
+        self._start_time = None
+        self._next_frame_time = 0.0
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self._next_frame_time = self._start_time
+
+    def set_region(self, region):
+        x1, y1, x2, y2 = region
+        shape = (y2 - y1, x2 - x1, 3)
+        if shape == self._shape:
+            return
+        self._shape = shape
+        # Несколько заранее сгенерированных фонов, чтобы кадры отличались
+        noise = self._rng.integers(-self.noise, self.noise + 1, size=(8,) + shape)
+        self._noise_frames = np.clip(self.background + noise, 0, 255).astype(np.uint8)
+        self._frame = np.empty(shape, dtype=np.uint8)
+
+    def get_latest(self):
+        if self._shape is None:
+            return None, 0.0
+        if self._start_time is None:
+            self.start()
+
+        if self.fps:
+            delay = self._next_frame_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_frame_time += 1.0 / self.fps
+
+        timestamp = time.perf_counter()
+        height = self._shape[0]
+        phase = ((timestamp - self._start_time) % self.period) / self.period
+        top = int(phase * (height + self.band_height)) - self.band_height
+
+        frame = self._frame
+        np.copyto(frame, self._noise_frames[self._frame_index % len(self._noise_frames)])
+        self._frame_index += 1
+        frame[max(top, 0):max(top + self.band_height, 0)] = self.color
+        return frame, timestamp
+
+
+class ReplayFrameSource(FrameSource):
+    """Воспроизведение заранее сохранённых кадров"""
+
+    def __init__(self, frames, timestamps=None, realtime=False, loop=True):
+        """
+        Args:
+            frames: Массив (N, H, W, 3), FrameReplayer, путь к .npy файлу
+                или префикс записи FrameRecorder
+            timestamps: Время кадров (сек) — нужно для realtime
+            realtime: Выдавать кадры с исходными интервалами
+            loop: Начинать заново после последнего кадра
+        """
+        if isinstance(frames, str):
+            if is_recording(frames):
+                frames = FrameReplayer(frames)
+            else:
+                frames = np.load(frames, mmap_mode='r')
+        if timestamps is None and isinstance(frames, FrameReplayer):
+            timestamps = frames.timestamps
+        self.frames = frames
+        self.timestamps = timestamps
+        self.realtime = realtime and timestamps is not None
+        self.self_paced = self.realtime
+        self.loop = loop
+        self._index = 0
+        self._start_time = None
+
+    def start(self):
+        self._index = 0
+        self._start_time = time.perf_counter()
+
+    def set_region(self, region):
+        # Регион определяется записью — игнорируем
+        pass
+
+    def get_latest(self):
+        if self._index >= len(self.frames):
+            if not self.loop or len(self.frames) == 0:
+                return None, 0.0
+            self._index = 0
+            self._start_time = time.perf_counter()
+        if self._start_time is None:
+            self.start()
+
+        if self.realtime:
+            target = self._start_time + (self.timestamps[self._index] - self.timestamps[0])
+            delay = target - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        frame = self.frames[self._index]
+        self._index += 1
+        return frame, time.perf_counter()
+
+
+FRAME_SOURCES = {
+    "dxcam": DxcamFrameSource,
+    "mss": MSSFrameSource,
+    "synthetic": SyntheticFrameSource,
+    "replay": ReplayFrameSource,
+}
+
+
+def create_frame_source(backend, **kwargs):
+    """
+    Создать источник кадров по имени
+
+    Args:
+        backend: "dxcam", "mss", "synthetic" или "replay"
+        **kwargs: Параметры конструктора источника
+
+    Returns:
+        FrameSource
+    """
+    try:
+        source_class = FRAME_SOURCES[backend]
+    except KeyError:
+        raise ValueError(f"Неизвестный источник кадров: {backend}")
+    return source_class(**kwargs)
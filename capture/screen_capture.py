@@ -1,56 +1,79 @@
 """
 Модуль захвата и анализа экрана
+
+Один цикл захвата обслуживает любой источник кадров (capture.frame_source).
 """
 
 import time
 import threading
 from collections import deque
-import dxcam
+from capture.frame_source import DxcamFrameSource
+from capture.frame_recorder import FrameRecorder
 from utils.color_utils import calculate_average_color, rgb_to_hex
 import keyboard
 from utils.global_state import GlobalState
+from utils.key_dispatcher import get_key_dispatcher
+from utils.frame_gate import FrameChangeGate
+from utils.frame_pacer import FramePacer
+from utils.latency_histogram import LatencyStats
+from utils.trace_recorder import get_tracer
+from utils.metrics_server import histogram_metrics
+from ui.state_channel import DetectorUIState
 import os
 import threading
 import config as app_config
 
-# Глобальный счётчик для уникальных device_idx
-_device_idx_lock = threading.Lock()
-_device_idx_counter = 0
-
 class ScreenCapture:
     """Класс для захвата и анализа экрана"""
     
-    def __init__(self, overlay, detector, target_fps=120, log_interval=30):
+    def __init__(self, overlay, detector, target_fps=120, log_interval=30, output_idx=0,
+                 source=None, region=None, send_keys=True, record_path=None,
+                 record_capacity=4096, skip_duplicates=True, change_gate_stride=4,
+                 pacer_spin_us=1000):
         """
         Args:
-            overlay: Объект DraggableOverlay
+            overlay: Объект DraggableOverlay (None — без UI, регион задаётся region)
             detector: Объект детектора цвета (BaseColorDetector)
             target_fps: Целевой FPS захвата
             log_interval: Интервал логирования (в кадрах)
+            output_idx: Индекс выхода (монитора) для источника dxcam по умолчанию
+            source: Источник кадров FrameSource (по умолчанию — общий dxcam)
+            region: Фиксированная область (x1, y1, x2, y2), если overlay не задан
+            send_keys: False — не нажимать клавиши (бенчмарки, профилирование)
+            record_path: Префикс файлов для записи кадров (None — без записи)
+            record_capacity: Размер кольца записи в кадрах
+            skip_duplicates: Не запускать детектор на кадрах, совпадающих с предыдущим
+            change_gate_stride: Шаг сетки сравнения для крупных кадров
+            pacer_spin_us: Длина активного ожидания перед дедлайном кадра (мкс)
         """
         self.overlay = overlay
         self.detector = detector
         self.target_fps = target_fps
+        self.pacer = FramePacer(target_fps, spin_us=pacer_spin_us)
         self.log_interval = log_interval
+        self.region = region
         
-        # Получаем уникальный device_idx для каждого экземпляра
-        global _device_idx_counter
-        with _device_idx_lock:
-            device_idx = _device_idx_counter % 4  # 0, 1, 2, 3
-            _device_idx_counter += 1
+        # Один общий захват на выход: все экземпляры получают срезы одного кадра
+        if source is None:
+            source = DxcamFrameSource(output_idx=output_idx, target_fps=target_fps)
+        self.source = source
         
-        print(f"[ScreenCapture] Используется device_idx={device_idx}")
+        # Запись кадров (файл создаётся по первому кадру, когда известна форма)
+        self.record_path = record_path
+        self.record_capacity = record_capacity
+        self.recorder = None
         
-        try:
-            self.camera = dxcam.create(device_idx=device_idx, output_idx=0)
-        except Exception as e:
-            print(f"[ERROR] Не удалось создать dxcam device_idx={device_idx}: {e}")
-            print("[INFO] Возможно, превышен лимит экземпляров (макс. 4)")
-            raise
+        # Повторные кадры: детектор не запускается, используется прошлый результат
+        self.change_gate = FrameChangeGate(sample_stride=change_gate_stride) if skip_duplicates else None
+        self._last_detection = False
         
         self.running = False
-        self.fps_counter = deque(maxlen=30)
+        self.fps_counter = deque(maxlen=30)  # Моменты обработки последних кадров (perf_counter)
         self.frame_count = 0
+        self.duplicate_frames = 0  # Кадр не изменился — детекция пропущена
+        self.skipped_frames = 0  # Источник не выдал кадр
+        self.detection_count = 0  # Кадров с срабатыванием детектора
+        self.press_count = 0
         self.start_time = None
         self.capture_thread = None
         
@@ -62,8 +85,11 @@ class ScreenCapture:
         
         # Регистрируем только ОДИН обработчик F8 (через threading.Lock)
         if not hasattr(keyboard, '_f8_registered'):
-            keyboard.add_hotkey('f8', self._on_global_toggle)
-            keyboard._f8_registered = True
+            try:
+                keyboard.add_hotkey('f8', self._on_global_toggle)
+                keyboard._f8_registered = True
+            except Exception as e:
+                print(f"[ScreenCapture] Горячая клавиша F8 недоступна: {e}")
         
         # Подписываемся на изменения глобального состояния
         self.global_state.add_observer(self._on_state_changed)
@@ -78,10 +104,36 @@ class ScreenCapture:
         self._last_fps_update = 0
         self.fps_update_interval = 1.0
         
+        # Детекторы без параметра frame получают средний цвет кадра
+        self._detect_with_frame = True
+        
         # Предварительное кэширование методов для скорости
-        self._keyboard_press = keyboard.press
-        self._keyboard_release = keyboard.release
-        self._overlay_after = overlay.root.after
+        # Клавиши эмулируются в отдельном потоке — здесь только постановка в очередь
+        self.key_dispatcher = get_key_dispatcher() if send_keys else None
+        if send_keys:
+            self._keyboard_press = self.key_dispatcher.press
+            self._keyboard_release = self.key_dispatcher.release
+        else:
+            self._keyboard_press = self._keyboard_release = lambda key, origin_ns=None, latency=None: None
+        
+        # Состояние для UI: пишем последнее значение, оверлей сам опрашивает его
+        self.ui_state = getattr(overlay, 'ui_state', None) or DetectorUIState()
+        
+        # Задержки по этапам, отсчёт от момента захвата кадра (perf_counter_ns)
+        self.latency = LatencyStats(detector.get_name())
+        self._lat_acquire = self.latency.stage("захват -> получение кадра")
+        self._lat_detect = self.latency.stage("детекция")
+        self._lat_decision = self.latency.stage("захват -> решение")
+        self._lat_key = self.latency.stage("захват -> эмуляция клавиши")
+        self.ui_state.ui_latency = self.latency.stage("захват -> отрисовка индикатора")
+        
+        # Трассировка интервалов (None — выключена, проверка стоит одно сравнение)
+        self.tracer = get_tracer()
+        if self.tracer is not None:
+            self._tr_loop = self.tracer.name_id("capture_loop")
+            self._tr_restart = self.tracer.name_id("restart_camera")
+            self._tr_detect = self.tracer.name_id("detect")
+            self._tr_ui_post = self.tracer.name_id("ui_post")
     
     def start(self):
         """Запуск захвата в отдельном потоке"""
@@ -90,6 +142,7 @@ class ScreenCapture:
         
         self.running = True
         self.start_time = time.time()
+        self.source.start()
         self.capture_thread = threading.Thread(
             target=self._capture_loop,
             daemon=True
@@ -105,8 +158,7 @@ class ScreenCapture:
         """Callback при изменении глобального состояния"""
         self.active = new_state
         # Обновляем чекбокс в UI
-        if self.overlay and hasattr(self.overlay, 'active_var'):
-            self.overlay.root.after(0, lambda: self.overlay.active_var.set(new_state))
+        self.ui_state.active = new_state
         print(f"[ScreenCapture] Состояние обновлено: {'Включено' if new_state else 'Выключено'}")
     
     def toggle_active(self):
@@ -118,71 +170,129 @@ class ScreenCapture:
         """Остановка захвата"""
         self.running = False
         self.global_state.stop_monitoring()
-        self.camera.stop() 
+        if self.capture_thread:
+            self.capture_thread.join(timeout=1.0)
+        self.source.stop()
+        if self.a_pressed:
+            self._keyboard_release(self.trigger_key)
+            self.a_pressed = False
+        if self.recorder:
+            self.recorder.close()
         self._print_statistics()
     
     def _capture_loop(self):
         """Основной цикл захвата"""
         region = None
+        # Источники без собственного темпа (mss) ограничиваем по target_fps;
+        # dxcam сам ждёт новый кадр, но без кадра цикл тоже не должен крутиться вхолостую
+        self_paced = self.source.self_paced
+        pacer = self.pacer
+        
+        # Регион публикует UI-поток оверлея — здесь только чтение, без Tk
+        region_channel = self.overlay.region_channel if self.overlay else None
+        region_version = None
+        tracer = self.tracer
         
         while self.running:
-            # Получаем текущую позицию области захвата
-            current_region = self.overlay.get_position()
+            if tracer is not None:
+                loop_start = time.perf_counter_ns()
             
-            # Перезапуск камеры при изменении региона
-            if region != current_region:
-                self._restart_camera(current_region)
-                region = current_region
+            # Получаем текущую позицию области захвата
+            if region_channel is not None:
+                version, current_region = region_channel.read()
+                if version != region_version:
+                    region_version = version
+                    self._restart_camera(current_region)
+            elif region != self.region:
+                region = self.region
+                self._restart_camera(region)
             
             # Захват и анализ кадра
-            self._process_frame()
+            if not self._process_frame() or not self_paced:
+                pacer.wait()
+            
+            if tracer is not None:
+                tracer.add(self._tr_loop, loop_start)
     
     def _restart_camera(self, region):
-        """Перезапуск камеры с новым регионом"""
-        self.camera.stop()
-        # УБРАЛИ DEBUG лог — он замедляет при перемещении
-        self.camera.start(target_fps=self.target_fps, region=region)
+        """Передача нового региона источнику (dxcam перезапускается только при смене объединённой области)"""
+        if self.tracer is None:
+            self.source.set_region(region)
+            return
+        start = time.perf_counter_ns()
+        self.source.set_region(region)
+        self.tracer.add(self._tr_restart, start)
+    
+    def _detect(self, frame):
+        """Вызов детектора (с кадром или по среднему цвету для простых детекторов)"""
+        if self._detect_with_frame:
+            try:
+                return self.detector.detect(0, 0, 0, frame=frame)
+            except TypeError:
+                self._detect_with_frame = False
+        r_avg, g_avg, b_avg = calculate_average_color(frame)
+        return self.detector.detect(r_avg, g_avg, b_avg)
     
     def _process_frame(self):
         """Обработка одного кадра (УЛЬТРА ОПТИМИЗАЦИЯ)"""
-        frame = self.camera.get_latest_frame()
+        frame, frame_timestamp = self.source.get_latest()
         
         if frame is None:
-            return
+            self.skipped_frames += 1
+            return False
         
-        frame_start = time.time()
+        acquired_ns = time.perf_counter_ns()
+        # Время захвата от источника (perf_counter, сек) — начало отсчёта всех этапов
+        origin_ns = int(frame_timestamp * 1e9) if frame_timestamp else acquired_ns
+        self._lat_acquire.record(acquired_ns - origin_ns)
+        
+        if self.record_path:
+            self._record_frame(frame, frame_timestamp)
         
         # --- ДЕТЕКЦИЯ (БЕЗ ЛИШНИХ ВЫЧИСЛЕНИЙ) ---
         # Передаём frame напрямую в детектор, он сам вычислит что нужно
-        detected = self.detector.detect(0, 0, 0, frame=frame)
+        if self.change_gate is not None and self.change_gate.is_duplicate(frame):
+            detected = self._last_detection
+            self.duplicate_frames += 1
+            decided_ns = time.perf_counter_ns()
+        else:
+            detect_ns = time.perf_counter_ns() if self.tracer is not None else 0
+            detected = self._detect(frame)
+            self._last_detection = detected
+            decided_ns = time.perf_counter_ns()
+            self._lat_detect.record(decided_ns - acquired_ns)
+            if detect_ns:
+                self.tracer.add(self._tr_detect, detect_ns, decided_ns)
+        self._lat_decision.record(decided_ns - origin_ns)
+        if detected:
+            self.detection_count += 1
         
         # --- УПРАВЛЕНИЕ КЛАВИШЕЙ (КРИТИЧЕСКИЙ ПУТЬ) ---
         if self.active:
             if detected != self.a_pressed:  # Оптимизация: одна проверка вместо двух
                 if detected:
-                    self._keyboard_press(self.trigger_key)
+                    self._keyboard_press(self.trigger_key, origin_ns, self._lat_key)
                     self.a_pressed = True
+                    self.press_count += 1
                     if self._last_key_pressed_state != True:
                         self._last_key_pressed_state = True
-                        self._overlay_after(0, self.overlay.update_key_pressed_indicator, True)
+                        self._post_key_indicator(True, origin_ns)
                 else:
-                    self._keyboard_release(self.trigger_key)
+                    self._keyboard_release(self.trigger_key, origin_ns, self._lat_key)
                     self.a_pressed = False
                     if self._last_key_pressed_state != False:
                         self._last_key_pressed_state = False
-                        self._overlay_after(0, self.overlay.update_key_pressed_indicator, False)
+                        self._post_key_indicator(False, origin_ns)
         else:
             if self.a_pressed:
                 self._keyboard_release(self.trigger_key)
                 self.a_pressed = False
                 if self._last_key_pressed_state != False:
                     self._last_key_pressed_state = False
-                    self._overlay_after(0, self.overlay.update_key_pressed_indicator, False)
+                    self._post_key_indicator(False)
 
-        # FPS (минимальное влияние)
-        frame_time = time.time() - frame_start
-        if frame_time > 0:
-            self.fps_counter.append(1 / frame_time)
+        # FPS по моментам обработки последних кадров
+        self.fps_counter.append(decided_ns / 1e9)
         self.frame_count += 1
 
         # UI обновление (раз в секунду)
@@ -192,16 +302,24 @@ class ScreenCapture:
             # Берём средний цвет центрального пикселя для квадрата
             cy, cx = frame.shape[0] // 2, frame.shape[1] // 2
             center_rgb = tuple(map(int, frame[cy, cx]))
-            self.overlay.update_border_color('', pixel_rgb=center_rgb)
-            avg_fps = sum(self.fps_counter) / len(self.fps_counter) if self.fps_counter else 0
-            self._overlay_after(0, self.overlay.update_fps, avg_fps)
+            self.ui_state.center_rgb = center_rgb
+            self.ui_state.fps = self._calculate_average_fps()
+        
+        return True
+    
+    def _record_frame(self, frame, timestamp):
+        """Запись кадра в кольцевой файл"""
+        if self.recorder is None:
+            self.recorder = FrameRecorder(self.record_path, frame.shape, self.record_capacity)
+            print(f"[ScreenCapture] Запись кадров {frame.shape} в {self.record_path}")
+        self.recorder.write(frame, timestamp)
     
-    def _update_fps(self, frame_start):
-        """Обновление счетчика FPS"""
-        frame_time = time.time() - frame_start
-        if frame_time > 0:
-            current_fps = 1 / frame_time
-            self.fps_counter.append(current_fps)
+    def _post_key_indicator(self, is_pressed, origin_ns=None):
+        """Обновление индикатора нажатия (применяется UI-потоком при следующем опросе)"""
+        self.ui_state.set_pressed(is_pressed, origin_ns)
+        if self.tracer is not None:
+            now = time.perf_counter_ns()
+            self.tracer.add(self._tr_ui_post, now, now)
     
     def _log_frame(self, r, g, b, hex_color, is_detected):
         """Логирование кадра"""
@@ -225,11 +343,44 @@ class ScreenCapture:
         print(f"[{elapsed:.3f}s] {message}")
     
     def _calculate_average_fps(self):
-        """Вычисление среднего FPS"""
-        if not self.fps_counter or len(self.fps_counter) == 0:
+        """Средний FPS по последним кадрам"""
+        if len(self.fps_counter) < 2:
             return 0
-        avg = sum(self.fps_counter) / len(self.fps_counter)
-        return avg
+        span = self.fps_counter[-1] - self.fps_counter[0]
+        return (len(self.fps_counter) - 1) / span if span > 0 else 0
+    
+    def get_latency_report(self):
+        """Текущий отчёт о задержках по этапам (можно вызывать во время работы)"""
+        lines = [self.latency.format()]
+        if self.key_dispatcher:
+            lines.append("  " + self.key_dispatcher.latency.format())
+        return "\n".join(lines)
+    
+    def print_latency_report(self):
+        print(self.get_latency_report())
+    
+    def collect_metrics(self):
+        """
+        Текущие счётчики для сервера метрик (только чтение, из потока сервера)
+        
+        Returns:
+            list: записи (name, type, help, labels, value)
+        """
+        labels = {"detector": self.detector.get_name(), "backend": type(self).__name__,
+                  "source": self.source.get_name()}
+        metrics = [
+            ("pyt_frames_total", "counter", "Обработанные кадры", labels, self.frame_count),
+            ("pyt_duplicate_frames_total", "counter", "Повторные кадры без детекции", labels, self.duplicate_frames),
+            ("pyt_skipped_frames_total", "counter", "Итерации без кадра от источника", labels, self.skipped_frames),
+            ("pyt_detections_total", "counter", "Кадры со срабатыванием детектора", labels, self.detection_count),
+            ("pyt_key_presses_total", "counter", "Нажатия клавиши", labels, self.press_count),
+            ("pyt_fps", "gauge", "Текущий FPS обработки", labels, self._calculate_average_fps()),
+            ("pyt_active", "gauge", "Детектор включён", labels, int(bool(self.active))),
+        ]
+        for stage, histogram in list(self.latency.stages.items()):
+            metrics.extend(histogram_metrics("pyt_stage_latency_seconds", "Задержка этапа конвейера",
+                                             histogram, dict(labels, stage=stage)))
+        return metrics
     
     def _print_statistics(self):
         """Вывод финальной статистики"""
@@ -238,6 +389,19 @@ class ScreenCapture:
         
         print("\n=== СТАТИСТИКА ===")
         print(f"Всего кадров: {self.frame_count}")
+        print(f"Повторных кадров (без детекции): {self.duplicate_frames}")
+        print(f"Пропущено (нет кадра): {self.skipped_frames}")
 
         print(f"Время работы: {total_time:.2f} секунд")      
         print(f"Средний FPS: {avg_fps:.1f}")
+        
+        if self.key_dispatcher:
+            print(f"Нажатий клавиш: {self.key_dispatcher.injected} "
+                  f"(лишних отброшено: {self.key_dispatcher.coalesced}, потеряно: {self.key_dispatcher.dropped})")
+        
+        pacer_stats = self.pacer.get_stats()
+        if pacer_stats['waits']:
+            print(f"Темп кадров: опоздание пробуждения среднее {pacer_stats['avg_late_us']:.0f} мкс, "
+                  f"макс {pacer_stats['max_late_us']:.0f} мкс, пропущено дедлайнов {pacer_stats['missed']}")
+        
+        print(self.get_latency_report())
@@ -0,0 +1,282 @@
+"""
+Общий движок захвата: один dxcam-захват на выход монитора для всех детекторов
+"""
+
+import time
+import threading
+import dxcam
+
+
+# Реестр движков: output_idx -> SharedCaptureEngine
+_engines_lock = threading.Lock()
+_engines = {}
+
+
+def get_capture_engine(output_idx=0, target_fps=120, window_margin=0, full_output=False):
+    """
+    Получить (или создать) общий движок захвата для выхода монитора
+
+    Args:
+        output_idx: Индекс выхода (монитора)
+        target_fps: Желаемый FPS (движок использует максимум из запрошенных)
+        window_margin: Запас окна захвата вокруг регионов (только при создании)
+        full_output: Захватывать весь выход (только при создании)
+
+    Returns:
+        SharedCaptureEngine
+    """
+    with _engines_lock:
+        engine = _engines.get(output_idx)
+        if engine is None:
+            engine = SharedCaptureEngine(output_idx=output_idx, target_fps=target_fps,
+                                         window_margin=window_margin, full_output=full_output)
+            _engines[output_idx] = engine
+        else:
+            engine.request_fps(target_fps)
+        return engine
+
+
+class SharedCaptureEngine:
+    """
+    Захват объединённой области всех активных детекторов одним кадром
+
+    Каждый потребитель регистрирует свой регион и получает zero-copy срез
+    (view) общего кадра. Камера dxcam создаётся одна на выход, поэтому
+    количество детекторов не ограничено лимитом экземпляров dxcam.
+
+    Окно захвата может быть больше объединённой области (window_margin или
+    весь выход): пока регионы двигаются внутри окна, меняется только
+    смещение среза, а камера перезапускается лишь при выходе за окно.
+    """
+
+    def __init__(self, output_idx=0, target_fps=120, window_margin=0, full_output=False):
+        """
+        Args:
+            output_idx: Индекс выхода (монитора)
+            target_fps: Целевой FPS камеры
+            window_margin: Запас окна захвата (пикселей) вокруг объединённой области
+            full_output: Захватывать весь выход (камера не перезапускается при перемещении)
+        """
+        self.output_idx = output_idx
+        self.target_fps = target_fps
+        self.window_margin = window_margin
+        self.full_output = full_output
+
+        try:
+            self.camera = dxcam.create(output_idx=output_idx)
+        except Exception as e:
+            print(f"[ERROR] Не удалось создать dxcam output_idx={output_idx}: {e}")
+            raise
+
+        # _lock — реестр регионов и состояние камеры; _grab_lock — очередь захватов.
+        # get_latest_frame ждёт изменения экрана (video_mode=False) и вызывается
+        # без _lock, чтобы update_region/register/unregister не ждали захват
+        self._lock = threading.Lock()
+        self._grab_lock = threading.Lock()
+        self._camera_generation = 0  # Меняется при каждом запуске/остановке камеры
+        self._regions = {}  # handle -> (x1, y1, x2, y2) или None
+        self._next_handle = 0
+
+        # Размер выхода (для ограничения окна захвата)
+        self._output_width = getattr(self.camera, "width", None)
+        self._output_height = getattr(self.camera, "height", None)
+
+        # Окно, с которым сейчас запущена камера (содержит все регионы)
+        self._capture_region = None
+        self._capture_fps = None
+        self._region_dirty = False
+        self._camera_running = False
+
+        # Последний захваченный кадр и регион, которому он соответствует
+        self._frame = None
+        self._frame_region = None
+        self._frame_seq = 0
+        self._frame_time = 0.0
+
+        # Статистика
+        self.grab_count = 0
+        self.restart_count = 0
+
+        print(f"[SharedCapture] Движок захвата создан для output_idx={output_idx}")
+
+    def request_fps(self, target_fps):
+        """Повысить целевой FPS, если потребителю нужно больше"""
+        with self._lock:
+            if target_fps > self.target_fps:
+                self.target_fps = target_fps
+                self._region_dirty = True
+
+    def register(self, region=None):
+        """
+        Зарегистрировать потребителя
+
+        Returns:
+            int: Дескриптор потребителя
+        """
+        with self._lock:
+            handle = self._next_handle
+            self._next_handle += 1
+            self._regions[handle] = region
+            self._region_dirty = True
+            return handle
+
+    def unregister(self, handle):
+        """Удалить потребителя (камера останавливается, если потребителей нет)"""
+        with self._lock:
+            self._regions.pop(handle, None)
+            self._region_dirty = True
+            if not self._regions:
+                self._stop_camera_locked()
+
+    def update_region(self, handle, region):
+        """
+        Обновить регион потребителя
+
+        Args:
+            handle: Дескриптор из register()
+            region: (x1, y1, x2, y2) или None, если потребитель неактивен
+        """
+        with self._lock:
+            if handle not in self._regions or self._regions[handle] == region:
+                return
+            self._regions[handle] = region
+            if not self._window_contains(self._capture_region, self._union_region_locked()):
+                self._region_dirty = True
+
+    def get_frame(self, handle, last_seq=-1):
+        """
+        Получить срез общего кадра для потребителя
+
+        Если потребитель уже видел текущий кадр (last_seq), выполняется один
+        новый захват, который затем разделяют все остальные потребители.
+
+        Args:
+            handle: Дескриптор из register()
+            last_seq: Номер кадра, полученного потребителем в прошлый раз
+
+        Returns:
+            tuple: (view или None, seq, время захвата кадра perf_counter)
+        """
+        grabbed = self._grab(last_seq)
+        with self._lock:
+            if not grabbed:
+                return None, self._frame_seq, self._frame_time
+            view = self._slice_locked(self._regions.get(handle))
+            return view, self._frame_seq, self._frame_time
+
+    def get_shared_frame(self, last_seq=-1):
+        """
+        Получить весь общий кадр (объединённую область)
+
+        Args:
+            last_seq: Номер кадра, полученного в прошлый раз
+
+        Returns:
+            tuple: (frame или None, регион кадра (x1, y1, x2, y2), seq, время захвата)
+        """
+        grabbed = self._grab(last_seq)
+        with self._lock:
+            if not grabbed or self._frame is None:
+                return None, None, self._frame_seq, self._frame_time
+            return self._frame, self._frame_region, self._frame_seq, self._frame_time
+
+    def _grab(self, last_seq):
+        """Новый захват, если текущий кадр уже видели (False — кадра нет)"""
+        with self._grab_lock:
+            with self._lock:
+                if self._region_dirty:
+                    self._apply_region_locked()
+                if self._frame is not None and self._frame_seq != last_seq:
+                    return True
+                if not self._camera_running:
+                    return False
+                generation = self._camera_generation
+                region = self._capture_region
+
+            frame = self.camera.get_latest_frame()
+            frame_time = time.perf_counter()
+
+            with self._lock:
+                # Пока ждали кадр, камеру перезапустили или остановили — кадр не того окна
+                if frame is None or generation != self._camera_generation:
+                    return False
+                self._frame = frame
+                self._frame_region = region
+                self._frame_seq += 1
+                self._frame_time = frame_time
+                self.grab_count += 1
+            return True
+
+    def _slice_locked(self, region):
+        """Zero-copy срез региона из последнего кадра"""
+        if region is None or self._frame_region is None:
+            return None
+        ux1, uy1, ux2, uy2 = self._frame_region
+        x1, y1, x2, y2 = region
+        # Регион сдвинулся за пределы уже захваченного кадра — ждём следующий
+        if x1 < ux1 or y1 < uy1 or x2 > ux2 or y2 > uy2:
+            return None
+        return self._frame[y1 - uy1:y2 - uy1, x1 - ux1:x2 - ux1]
+
+    def _union_region_locked(self):
+        """Ограничивающий прямоугольник всех активных регионов"""
+        regions = [r for r in self._regions.values() if r is not None]
+        if not regions:
+            return None
+        return (
+            min(r[0] for r in regions),
+            min(r[1] for r in regions),
+            max(r[2] for r in regions),
+            max(r[3] for r in regions),
+        )
+
+    @staticmethod
+    def _window_contains(window, region):
+        """Регион целиком внутри окна захвата"""
+        if window is None or region is None:
+            return window == region
+        return (region[0] >= window[0] and region[1] >= window[1]
+                and region[2] <= window[2] and region[3] <= window[3])
+
+    def _window_for(self, union):
+        """Окно захвата для объединённой области (с запасом, в пределах выхода)"""
+        width, height = self._output_width, self._output_height
+        if self.full_output and width and height:
+            return (0, 0, width, height)
+
+        margin = self.window_margin
+        x1, y1, x2, y2 = union[0] - margin, union[1] - margin, union[2] + margin, union[3] + margin
+        if width and height:
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(width, x2), min(height, y2)
+        return (x1, y1, x2, y2)
+
+    def _apply_region_locked(self):
+        """Перезапуск камеры, если объединённая область вышла за окно захвата"""
+        self._region_dirty = False
+        union = self._union_region_locked()
+        if (self._camera_running and self._capture_fps == self.target_fps
+                and self._window_contains(self._capture_region, union)):
+            return
+
+        self._stop_camera_locked()
+        if union is None:
+            self._capture_region = None
+            return
+
+        self._capture_region = self._window_for(union)
+
+        self._capture_fps = self.target_fps
+        self.camera.start(target_fps=self.target_fps, region=self._capture_region)
+        self._camera_running = True
+        self._camera_generation += 1
+        self.restart_count += 1
+
+    def _stop_camera_locked(self):
+        if self._camera_running:
+            # stop() будит поток, ждущий в get_latest_frame; его кадр отбросит проверка поколения
+            self.camera.stop()
+            self._camera_running = False
+            self._camera_generation += 1
+        self._frame = None
+        self._frame_region = None
@@ -9,10 +9,33 @@ BORDER_WIDTH = 3
 
 # Параметры захвата (МАКСИМАЛЬНАЯ СКОРОСТЬ)
 TARGET_FPS = 300  # Увеличили до 300 для минимальной задержки
+PACER_SPIN_US = 1000  # Последний отрезок до кадра ждём в цикле (точнее, чем time.sleep)
+
+# Окно захвата dxcam больше области: при перетаскивании внутри окна меняется
+# только смещение среза, камера перезапускается лишь при выходе за окно
+CAPTURE_WINDOW_MARGIN = 200  # Запас окна вокруг области (пикселей)
+CAPTURE_FULL_OUTPUT = False  # True — захватывать весь монитор (без перезапусков вовсе)
+
+# Пропуск детекции на кадрах, не изменившихся с прошлого раза
+SKIP_DUPLICATE_FRAMES = True
+CHANGE_GATE_STRIDE = 4  # Шаг сетки сравнения для крупных областей
 
 # Параметры логирования (ОТКЛЮЧЕНО)
 LOG_EVERY_N_FRAMES = 99999  # Практически не логируем
 
+# Запись кадров для офлайн-воспроизведения (None — запись отключена)
+# Пример: "recordings/session" -> recordings/session.frames/.index/.json
+RECORD_PATH = None
+RECORD_CAPACITY = 4096  # Кадров в кольце (старые перезаписываются)
+
+# Трассировка интервалов цикла захвата в Chrome trace-event JSON (None — выключена)
+# Файл открывается в ui.perfetto.dev; пример: "recordings/trace.json"
+TRACE_PATH = None
+TRACE_CAPACITY = 262144  # Последних интервалов в буфере
+
+# Метрики в формате Prometheus на http://127.0.0.1:<порт>/metrics (None — выключено)
+METRICS_PORT = None
+
 # Настройки детекции синего цвета
 BLUE_DETECTION = {
     'min_blue': 100,
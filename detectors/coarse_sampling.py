@@ -0,0 +1,76 @@
+"""
+Грубая проверка области по разреженной сетке перед полным проходом
+"""
+
+
+class CoarseSampler:
+    """
+    Решение по сетке пикселей с шагом sample_stride
+
+    Доля совпавших пикселей сетки сравнивается с min_percent. Если она
+    выше порога больше чем в (1 + sample_margin) раз или ниже меньше чем
+    в (1 - sample_margin) раз, ответ даётся сразу; в полосе вокруг порога
+    детектор делает полный проход. Если на сетке ожидается меньше
+    MIN_EXPECTED совпадений при пороговой доле, выборка слишком мала для
+    оценки и сразу выполняется полный проход.
+    """
+
+    MIN_EXPECTED = 8
+
+    def __init__(self, stride=4, margin=0.5):
+        """
+        Args:
+            stride: Шаг сетки по строкам и столбцам (плотность выборки 1/stride²)
+            margin: Относительная ширина полосы вокруг порога, где нужен полный проход
+        """
+        self.stride = max(2, int(stride))
+        self.margin = margin
+        self._offset = self.stride // 2
+
+        # Статистика
+        self.coarse_hits = 0
+        self.coarse_misses = 0
+        self.full_passes = 0
+
+    def check(self, frame, count_matches, min_percent):
+        """
+        Грубая проверка кадра
+
+        Args:
+            frame: Кадр (H, W, 3)
+            count_matches: Функция подсчёта совпавших пикселей в массиве (h, w, 3)
+            min_percent: Порог доли совпавших пикселей
+
+        Returns:
+            True/False — решение по сетке, None — нужен полный проход
+        """
+        offset, stride = self._offset, self.stride
+        sample = frame[offset::stride, offset::stride]
+        pixels = sample.shape[0] * sample.shape[1]
+        expected = min_percent * pixels
+        if expected < self.MIN_EXPECTED:
+            self.full_passes += 1
+            return None
+
+        count = count_matches(sample)
+        if count >= expected * (1 + self.margin):
+            self.coarse_hits += 1
+            return True
+        if count <= expected * (1 - self.margin):
+            self.coarse_misses += 1
+            return False
+        self.full_passes += 1
+        return None
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: coarse_hits, coarse_misses, full_passes, coarse_rate
+        """
+        total = self.coarse_hits + self.coarse_misses + self.full_passes
+        return {
+            "coarse_hits": self.coarse_hits,
+            "coarse_misses": self.coarse_misses,
+            "full_passes": self.full_passes,
+            "coarse_rate": (self.coarse_hits + self.coarse_misses) / total if total else 0.0,
+        }
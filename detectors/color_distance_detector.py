@@ -0,0 +1,99 @@
+"""
+Детектор по расстоянию до целевых цветов (сфера допуска) в целочисленной арифметике
+"""
+
+import numpy as np
+
+
+class ColorDistanceDetector:
+    """
+    Пиксель совпадает, если взвешенное евклидово расстояние до одного из
+    целевых цветов не больше tolerance
+
+    Разности, квадраты и сумма каналов считаются в int32 без перехода
+    к float; сравнение идёт с tolerance² (корень не берётся).
+    Все буферы выделяются заранее и пересоздаются только при смене
+    размера области.
+
+    Настройки:
+        target_color: [R, G, B] или target_colors: [[R, G, B], ...]
+        tolerance: Радиус сферы допуска (в единицах RGB)
+        channel_weights: Целые веса каналов [wR, wG, wB] (по умолчанию [1, 1, 1])
+    """
+
+    def __init__(self, config):
+        targets = config.get("target_colors") or [config.get("target_color", [255, 255, 255])]
+        self.targets = np.array(targets, dtype=np.int32).reshape(-1, 3)
+        self.tolerance = config.get("tolerance", 30)
+        self.channel_weights = [int(w) for w in config.get("channel_weights", [1, 1, 1])]
+        self.min_percent = config.get("min_percent", 0.01)
+        self.trigger_key = config.get("trigger_key", "a")
+        self._last_detected = False
+
+        # Порог для суммы квадратов (с весами); int32 хватает: 3 * 255² * w < 2^31 при w < 11000
+        self._threshold = int(self.tolerance) ** 2
+
+        # Рабочие буферы (создаются под размер кадра)
+        self._shape = None
+        self._square = None
+        self._distance = None
+        self._mask = None
+        self._any = None
+
+    def get_name(self):
+        colors = ",".join(f"({r},{g},{b})" for r, g, b in self.targets.tolist())
+        return f"Distance [{colors} ±{self.tolerance}]"
+
+    def _allocate(self, shape):
+        """Пересоздать буферы под новый размер области"""
+        self._shape = shape
+        self._square = np.empty(shape, dtype=np.int32)
+        self._distance = np.empty(shape, dtype=np.int32)
+        self._mask = np.empty(shape, dtype=bool)
+        self._any = np.empty(shape, dtype=bool)
+
+    def _distance_mask(self, frame, target, out):
+        """out = (взвешенное расстояние² до target) <= tolerance²"""
+        square, distance = self._square, self._distance
+        for c in range(3):
+            # Канал копируется в int32 и дальше считается на месте (без временных массивов)
+            acc = distance if c == 0 else square
+            np.copyto(acc, frame[..., c])
+            np.subtract(acc, target[c], out=acc)
+            np.multiply(acc, acc, out=acc)
+            weight = self.channel_weights[c]
+            if weight != 1:
+                np.multiply(acc, weight, out=acc)
+            if c:
+                np.add(distance, square, out=distance)
+        np.less_equal(distance, self._threshold, out=out)
+
+    def count_matches(self, frame):
+        """Количество пикселей кадра в сфере допуска хотя бы одного цвета"""
+        shape = frame.shape[:2]
+        if shape != self._shape:
+            self._allocate(shape)
+
+        targets = self.targets
+        mask = self._mask
+        self._distance_mask(frame, targets[0], mask)
+        for target in targets[1:]:
+            self._distance_mask(frame, target, self._any)
+            np.logical_or(mask, self._any, out=mask)
+        return np.count_nonzero(mask)
+
+    def detect(self, r, g, b, frame=None):
+        """Детекция по кадру (r, g, b игнорируются)"""
+        if frame is None:
+            return False
+
+        pixels = frame.shape[0] * frame.shape[1]
+        detected = self.count_matches(frame) >= self.min_percent * pixels
+        self._last_detected = detected
+        return detected
+
+    def get_detection_message(self, r, g, b):
+        return "Обнаружен цвет"
+
+    def last_detected(self):
+        return self._last_detected
@@ -0,0 +1,173 @@
+"""
+Детектор по правилам в HSV/Lab через заранее вычисленную 3D-таблицу RGB
+"""
+
+import numpy as np
+
+
+def rgb_to_hsv(rgb):
+    """
+    RGB (..., 3) uint8 -> H в градусах [0, 360), S и V в [0, 1]
+    """
+    rgb = rgb.astype(np.float64) / 255.0
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    v = rgb.max(axis=-1)
+    delta = v - rgb.min(axis=-1)
+    s = np.divide(delta, v, out=np.zeros_like(v), where=v > 0)
+
+    safe = np.where(delta > 0, delta, 1.0)
+    h = np.where(v == r, ((g - b) / safe) % 6,
+                 np.where(v == g, (b - r) / safe + 2, (r - g) / safe + 4)) * 60.0
+    h = np.where(delta > 0, h, 0.0)
+    return np.stack([h, s, v], axis=-1)
+
+
+def rgb_to_lab(rgb):
+    """
+    sRGB (..., 3) uint8 -> CIE Lab (D65)
+    """
+    c = rgb.astype(np.float64) / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    matrix = np.array([
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ])
+    xyz = linear @ matrix.T / np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    L = 116 * f[..., 1] - 16
+    a = 500 * (f[..., 0] - f[..., 1])
+    b = 200 * (f[..., 1] - f[..., 2])
+    return np.stack([L, a, b], axis=-1)
+
+
+class ColorSpaceLutDetector:
+    """
+    Детектор с правилами в HSV или Lab без перевода кадра в другое пространство
+
+    При загрузке каждый из (2^lut_bits)^3 квантованных цветов RGB (по центру
+    ячейки) один раз переводится в HSV/Lab и проверяется правилом; результат
+    хранится в таблице. На кадре старшие lut_bits бит каналов упаковываются
+    в индекс ячейки, классификация — один np.take по таблице. lut_bits=8 —
+    полная таблица на 2^24 цветов (16 МБ) без погрешности квантования.
+
+    Правила (поле "color_space"):
+        hsv: hue_range [от, до] в градусах (от > до — через 0°),
+             sat_range и val_range в [0, 1]
+        lab: lab_target [L, a, b] и lab_max_distance (ΔE76); без lab_target
+             берётся центр диапазона min_rgb/max_rgb
+    """
+
+    def __init__(self, config):
+        self.color_space = config.get("color_space", "hsv")
+        self.min_percent = config.get("min_percent", 0.01)
+        self.trigger_key = config.get("trigger_key", "a")
+        self.lut_bits = int(config.get("lut_bits", 5))
+        if not 1 <= self.lut_bits <= 8:
+            raise ValueError("lut_bits должен быть от 1 до 8")
+        self._last_detected = False
+
+        self.hue_range = config.get("hue_range", [0, 360])
+        self.sat_range = config.get("sat_range", [0.0, 1.0])
+        self.val_range = config.get("val_range", [0.0, 1.0])
+        self.lab_target = config.get("lab_target")
+        if self.lab_target is None:
+            center = (np.array(config.get("min_rgb", [0, 0, 0])) + np.array(config.get("max_rgb", [255, 255, 255]))) // 2
+            self.lab_target = rgb_to_lab(center.astype(np.uint8)).tolist()
+        self.lab_max_distance = config.get("lab_max_distance", 10.0)
+
+        self._lut = self._build_lut()
+        self.match_fraction = float(self._lut.mean())  # Доля цветов RGB, проходящих правило
+
+        # Рабочие буферы (создаются под размер кадра)
+        self._shape = None
+        self._index = None
+        self._channel = None
+        self._mask = None
+
+    def get_name(self):
+        if self.color_space == "lab":
+            L, a, b = self.lab_target
+            return f"Lab [{L:.0f},{a:.0f},{b:.0f} ΔE≤{self.lab_max_distance}]"
+        return f"HSV [H {self.hue_range[0]}-{self.hue_range[1]}, S {self.sat_range[0]}-{self.sat_range[1]}, V {self.val_range[0]}-{self.val_range[1]}]"
+
+    def _build_lut(self):
+        """Таблица совпадений для всех ячеек квантованного куба RGB"""
+        levels = 1 << self.lut_bits
+        step = 256 // levels
+        centers = (np.arange(levels) * step + step // 2).astype(np.uint8)
+        # Порядок ячеек совпадает с индексом (r << 2b) | (g << b) | b
+        cube = np.stack(np.meshgrid(centers, centers, centers, indexing="ij"), axis=-1).reshape(-1, 3)
+
+        lut = np.empty(len(cube), dtype=bool)
+        chunk = 1 << 20  # Полная таблица 2^24 считается частями
+        for start in range(0, len(cube), chunk):
+            lut[start:start + chunk] = self._match(cube[start:start + chunk])
+        return lut
+
+    def _match(self, rgb):
+        """Правило цветового пространства для массива цветов (N, 3)"""
+        if self.color_space == "lab":
+            distance = np.linalg.norm(rgb_to_lab(rgb) - np.array(self.lab_target), axis=-1)
+            return distance <= self.lab_max_distance
+
+        if self.color_space != "hsv":
+            raise ValueError(f"Неизвестное цветовое пространство: {self.color_space}")
+        hsv = rgb_to_hsv(rgb)
+        h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+        h_min, h_max = self.hue_range
+        if h_min <= h_max:
+            hue_ok = (h >= h_min) & (h <= h_max)
+        else:
+            hue_ok = (h >= h_min) | (h <= h_max)
+        return (hue_ok
+                & (s >= self.sat_range[0]) & (s <= self.sat_range[1])
+                & (v >= self.val_range[0]) & (v <= self.val_range[1]))
+
+    def _allocate(self, shape):
+        """Пересоздать буферы под новый размер области"""
+        self._shape = shape
+        self._index = np.empty(shape, dtype=np.intp)
+        self._channel = np.empty(shape, dtype=np.intp)
+        self._mask = np.empty(shape, dtype=bool)
+
+    def count_matches(self, frame):
+        """Количество пикселей кадра, проходящих правило"""
+        shape = frame.shape[:2]
+        if shape != self._shape:
+            self._allocate(shape)
+
+        index, channel = self._index, self._channel
+        bits = self.lut_bits
+        shift = 8 - bits
+
+        # index = (r >> shift) << 2*bits | (g >> shift) << bits | (b >> shift)
+        np.copyto(index, frame[..., 0], casting='unsafe')
+        np.right_shift(index, shift, out=index)
+        np.left_shift(index, bits, out=index)
+        np.copyto(channel, frame[..., 1], casting='unsafe')
+        np.right_shift(channel, shift, out=channel)
+        np.bitwise_or(index, channel, out=index)
+        np.left_shift(index, bits, out=index)
+        np.copyto(channel, frame[..., 2], casting='unsafe')
+        np.right_shift(channel, shift, out=channel)
+        np.bitwise_or(index, channel, out=index)
+
+        np.take(self._lut, index, out=self._mask, mode='clip')
+        return np.count_nonzero(self._mask)
+
+    def detect(self, r, g, b, frame=None):
+        """Детекция по кадру (r, g, b игнорируются)"""
+        if frame is None:
+            return False
+
+        pixels = frame.shape[0] * frame.shape[1]
+        detected = self.count_matches(frame) >= self.min_percent * pixels
+        self._last_detected = detected
+        return detected
+
+    def get_detection_message(self, r, g, b):
+        return "Обнаружен цвет"
+
+    def last_detected(self):
+        return self._last_detected
@@ -0,0 +1,91 @@
+"""
+Скомпилированный детектор диапазона RGB на таблицах подстановки (без аллокаций)
+"""
+
+import numpy as np
+
+
+class CompiledRangeDetector:
+    """
+    Детектор диапазона RGB без выделения памяти на кадр
+
+    Диапазоны min_rgb/max_rgb один раз компилируются в три таблицы по 256
+    значений (по одной на канал). Каждый кадр классифицируется через
+    np.take по таблицам в заранее выделенные буферы; буферы пересоздаются
+    только при смене размера области.
+    """
+
+    def __init__(self, config):
+        self.min_rgb = np.array(config.get("min_rgb", [0, 0, 0]), dtype=np.uint8)
+        self.max_rgb = np.array(config.get("max_rgb", [255, 255, 255]), dtype=np.uint8)
+        self.min_percent = config.get("min_percent", 0.01)
+        self.trigger_key = config.get("trigger_key", "a")
+        self._last_detected = False
+
+        # Таблицы подстановки: lut[c][v] == True, если значение v канала c в диапазоне
+        values = np.arange(256)
+        self._luts = [
+            (values >= self.min_rgb[c]) & (values <= self.max_rgb[c])
+            for c in range(3)
+        ]
+
+        # Рабочие буферы (создаются под размер кадра)
+        self._shape = None
+        self._index = None
+        self._mask = None
+        self._channel_mask = None
+
+    def get_name(self):
+        return f"Compiled [{self.min_rgb[0]}-{self.max_rgb[0]},{self.min_rgb[1]}-{self.max_rgb[1]},{self.min_rgb[2]}-{self.max_rgb[2]}]"
+
+    def _allocate(self, shape):
+        """Пересоздать буферы под новый размер области"""
+        self._shape = shape
+        self._index = np.empty(shape, dtype=np.intp)
+        self._mask = np.empty(shape, dtype=bool)
+        self._channel_mask = np.empty(shape, dtype=bool)
+
+    def classify(self, frame):
+        """
+        Маска пикселей в диапазоне
+
+        Returns:
+            numpy bool (H, W) (буфер переиспользуется следующим вызовом)
+        """
+        shape = frame.shape[:2]
+        if shape != self._shape:
+            self._allocate(shape)
+
+        index, mask, channel_mask = self._index, self._mask, self._channel_mask
+        luts = self._luts
+
+        # Индексы приводятся к intp в свой буфер — иначе np.take копирует их на каждом вызове
+        np.copyto(index, frame[..., 0], casting='unsafe')
+        np.take(luts[0], index, out=mask, mode='clip')
+        np.copyto(index, frame[..., 1], casting='unsafe')
+        np.take(luts[1], index, out=channel_mask, mode='clip')
+        np.logical_and(mask, channel_mask, out=mask)
+        np.copyto(index, frame[..., 2], casting='unsafe')
+        np.take(luts[2], index, out=channel_mask, mode='clip')
+        np.logical_and(mask, channel_mask, out=mask)
+        return mask
+
+    def count_matches(self, frame):
+        """Количество пикселей кадра, попадающих в диапазон"""
+        return np.count_nonzero(self.classify(frame))
+
+    def detect(self, r, g, b, frame=None):
+        """Детекция по кадру (r, g, b игнорируются)"""
+        if frame is None:
+            return False
+
+        pixels = frame.shape[0] * frame.shape[1]
+        detected = self.count_matches(frame) >= self.min_percent * pixels
+        self._last_detected = detected
+        return detected
+
+    def get_detection_message(self, r, g, b):
+        return "Обнаружен цвет"
+
+    def last_detected(self):
+        return self._last_detected
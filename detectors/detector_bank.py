@@ -0,0 +1,231 @@
+"""
+Пакетная проверка нескольких диапазонов RGB за один проход по кадру
+"""
+
+import math
+import numpy as np
+from detectors.strip_edge_detector import find_leading_edge, resolve_trigger_row
+
+
+def crop_regions(frame, regions):
+    """
+    Вырезки (view) регионов кадра; одинаковые регионы дают один и тот же объект
+
+    Args:
+        frame: Кадр RGB (H, W, 3)
+        regions: Список срезов (y1, y2, x1, x2) или None
+
+    Returns:
+        list: view кадра или None для каждого региона
+    """
+    views = {None: None}
+    crops = []
+    for region in regions:
+        crop = views.get(region)
+        if crop is None and region is not None:
+            y1, y2, x1, x2 = region
+            crop = views[region] = frame[y1:y2, x1:x2]
+        crops.append(crop)
+    return crops
+
+
+class DetectorBank:
+    """
+    Набор детекторов диапазона RGB, проверяемых за один проход
+
+    Диапазоны всех N детекторов складываются в массивы (N, 3) и компилируются
+    в три таблицы по 256 значений, где бит i выставлен, если значение канала
+    попадает в диапазон детектора i. Один проход по кадру даёт для каждого
+    пикселя битовую маску совпавших детекторов; счётчики по детекторам
+    считаются уже по этой маске.
+
+    Если у детекторов свои регионы, классифицируется только вырезка
+    каждого региона (evaluate_crops), а не весь общий кадр: стоимость
+    зависит от размера регионов, а не от окна захвата.
+
+    Детекторы с полем trigger_row работают в режиме переднего края (как
+    StripEdgeDetector): регион сворачивается в профиль по строкам, а
+    срабатывание — когда край объекта дошёл до строки trigger_row.
+    """
+
+    # Поля конфигурации детектора, которые использует банк (их передают в процессы детекции)
+    CONFIG_KEYS = ("min_rgb", "max_rgb", "min_percent", "trigger_row", "direction", "row_min_percent")
+
+    def __init__(self, configs):
+        """
+        Args:
+            configs: Список словарей с min_rgb, max_rgb, min_percent
+        """
+        self.size = len(configs)
+        if self.size > 64:
+            raise ValueError("DetectorBank поддерживает не более 64 детекторов")
+
+        self.min_rgb = np.array([c.get("min_rgb", [0, 0, 0]) for c in configs], dtype=np.uint8).reshape(-1, 3)
+        self.max_rgb = np.array([c.get("max_rgb", [255, 255, 255]) for c in configs], dtype=np.uint8).reshape(-1, 3)
+        self.min_percent = np.array([c.get("min_percent", 0.01) for c in configs], dtype=np.float64)
+
+        # Режим переднего края: (trigger_row, direction, row_min_percent) или None
+        self._edge_modes = [
+            (c["trigger_row"], c.get("direction", "down"), c.get("row_min_percent", 0.5))
+            if "trigger_row" in c else None
+            for c in configs
+        ]
+        for edge_mode in self._edge_modes:
+            if edge_mode is not None and edge_mode[1] not in ("down", "up"):
+                raise ValueError(f"Неизвестное направление: {edge_mode[1]}")
+        self.edges = np.full(self.size, np.nan)  # Позиция края в регионе (строки), NaN — нет объекта
+
+        # Самый узкий тип, в который помещаются N бит
+        for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+            if np.iinfo(dtype).bits >= self.size:
+                self._dtype = dtype
+                break
+
+        # Бит каждого детектора и таблицы подстановки: lut[c][v] — биты
+        # детекторов, в диапазон которых попадает значение v канала c
+        self._bits = np.array([1 << i for i in range(self.size)], dtype=self._dtype)
+        values = np.arange(256)
+        self._luts = []
+        for c in range(3):
+            lut = np.zeros(256, dtype=self._dtype)
+            for i in range(self.size):
+                in_range = (values >= self.min_rgb[i, c]) & (values <= self.max_rgb[i, c])
+                lut[in_range] |= self._bits[i]
+            self._luts.append(lut)
+
+        # Результаты и рабочие буферы
+        self.counts = np.zeros(self.size, dtype=np.int64)
+        self.hits = np.zeros(self.size, dtype=bool)
+        self._buffers = {}  # (H, W) -> (index, mask, channel_mask)
+        self._required_counts = {}
+
+    def _buffers_for(self, shape):
+        """Рабочие буферы под размер (у каждого размера региона свои)"""
+        buffers = self._buffers.get(shape)
+        if buffers is None:
+            buffers = (np.empty(shape, dtype=np.intp),
+                       np.empty(shape, dtype=self._dtype),
+                       np.empty(shape, dtype=self._dtype))
+            self._buffers[shape] = buffers
+        return buffers
+
+    def _required_count(self, i, pixels):
+        """Минимальное число совпавших пикселей для детектора i"""
+        key = (i, pixels)
+        required = self._required_counts.get(key)
+        if required is None:
+            required = max(0, math.ceil(self.min_percent[i] * pixels - 1e-9))
+            self._required_counts[key] = required
+        return required
+
+    def classify(self, frame):
+        """
+        Битовая маска совпавших детекторов для каждого пикселя
+
+        Returns:
+            numpy (H, W): бит i выставлен, если пиксель в диапазоне детектора i
+            (буфер переиспользуется следующим вызовом)
+        """
+        index, mask, channel_mask = self._buffers_for(frame.shape[:2])
+        luts = self._luts
+
+        np.copyto(index, frame[..., 0], casting='unsafe')
+        np.take(luts[0], index, out=mask, mode='clip')
+        np.copyto(index, frame[..., 1], casting='unsafe')
+        np.take(luts[1], index, out=channel_mask, mode='clip')
+        np.bitwise_and(mask, channel_mask, out=mask)
+        np.copyto(index, frame[..., 2], casting='unsafe')
+        np.take(luts[2], index, out=channel_mask, mode='clip')
+        np.bitwise_and(mask, channel_mask, out=mask)
+        return mask
+
+    def _edge_hit(self, i, area_bits, edge_mode):
+        """Срабатывание детектора i по переднему краю в его регионе"""
+        trigger_row, direction, row_min_percent = edge_mode
+        height, width = area_bits.shape
+        profile = np.count_nonzero(area_bits, axis=1)
+        edge, hit = find_leading_edge(profile, max(1, math.ceil(row_min_percent * width)),
+                                      resolve_trigger_row(trigger_row, height, direction), direction)
+        self.edges[i] = np.nan if edge is None else edge
+        return hit
+
+    def _evaluate_one(self, i, area, out):
+        """Счётчик и срабатывание детектора i по маске area (out — буфер той же формы)"""
+        np.bitwise_and(area, self._bits[i], out=out)
+        count = np.count_nonzero(out)
+        self.counts[i] = count
+        edge_mode = self._edge_modes[i]
+        if edge_mode is None:
+            return count >= self._required_count(i, area.size)
+        return self._edge_hit(i, out, edge_mode)
+
+    def _skip(self, i):
+        self.counts[i] = 0
+        self.hits[i] = False
+        self.edges[i] = np.nan
+
+    def evaluate_crops(self, crops):
+        """
+        Проверить каждый детектор по его вырезке кадра
+
+        Args:
+            crops: Список кадров RGB (h, w, 3) для каждого детектора,
+                None или пустая вырезка — детектор пропускается; у детекторов
+                с одинаковым регионом — один и тот же объект (классифицируется
+                один раз)
+
+        Returns:
+            tuple: (counts (N,) — число совпавших пикселей,
+                    bitmask — int с битами сработавших детекторов)
+        """
+        bitmask = 0
+        classified = {}  # (h, w) -> вырезка, чья маска сейчас в буфере этого размера
+        for i in range(self.size):
+            crop = crops[i]
+            if crop is None or crop.size == 0:
+                self._skip(i)
+                continue
+            shape = crop.shape[:2]
+            buffers = self._buffers_for(shape)
+            if classified.get(shape) is crop:
+                mask = buffers[1]
+            else:
+                mask = self.classify(crop)
+                classified[shape] = crop
+            hit = self._evaluate_one(i, mask, buffers[2])
+            self.hits[i] = hit
+            if hit:
+                bitmask |= 1 << i
+        return self.counts, bitmask
+
+    def evaluate(self, frame, regions=None):
+        """
+        Проверить все детекторы по одному кадру
+
+        Args:
+            frame: Кадр RGB (H, W, 3)
+            regions: Список срезов (y1, y2, x1, x2) относительно кадра для
+                каждого детектора, None в списке — детектор пропускается;
+                regions=None — все детекторы смотрят на весь кадр
+
+        Returns:
+            tuple: (counts (N,) — число совпавших пикселей,
+                    bitmask — int с битами сработавших детекторов)
+        """
+        if regions is not None:
+            return self.evaluate_crops(crop_regions(frame, regions))
+
+        # Весь кадр общий для всех детекторов — одна классификация
+        bitmask = 0
+        if frame.size == 0:
+            for i in range(self.size):
+                self._skip(i)
+            return self.counts, bitmask
+        mask = self.classify(frame)
+        scratch = self._buffers_for(mask.shape)[2]
+        for i in range(self.size):
+            hit = self._evaluate_one(i, mask, scratch)
+            self.hits[i] = hit
+            if hit:
+                bitmask |= 1 << i
+        return self.counts, bitmask
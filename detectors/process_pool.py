@@ -0,0 +1,218 @@
+"""
+Детекция в отдельных процессах: кадры идут через общую память, обратно — только счётчики
+
+Каждый процесс держит свой DetectorBank со всеми детекторами. В слот кольца
+пишутся только вырезки регионов детекторов (не всё окно захвата), процесс
+проверяет их через evaluate_crops; разные кадры проверяются параллельно на
+разных ядрах, поэтому пропускная способность детекции не упирается в GIL.
+"""
+
+import multiprocessing as mp
+import queue
+
+from utils.shared_frame_ring import SharedFrameRing
+from detectors.detector_bank import DetectorBank
+
+
+def _worker_main(configs, jobs, results):
+    """Цикл процесса-детектора"""
+    bank = DetectorBank(configs)
+    ring = None
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        seq, ring_name, slot, layout = job
+
+        if ring is None or ring.name != ring_name:
+            if ring is not None:
+                ring.close()
+            ring = SharedFrameRing.attach(ring_name)
+
+        if ring.slot_seq(slot) != seq:
+            results.put((seq, None, None, None))
+            continue
+        # Одинаковая часть слота — один объект, банк классифицирует её один раз
+        views = {None: None}
+        for part in layout:
+            if part not in views:
+                views[part] = ring.view(slot, part[1], part[0])
+        counts, bitmask = bank.evaluate_crops([views[part] for part in layout])
+        del views
+        # Кадр перезаписали во время проверки — результат недостоверен
+        if ring.slot_seq(slot) != seq:
+            results.put((seq, None, None, None))
+            continue
+        results.put((seq, tuple(counts.tolist()), bitmask, tuple(bank.edges.tolist())))
+
+    if ring is not None:
+        ring.close()
+
+
+class DetectorProcessPool:
+    """Пул процессов детекции с кольцом кадров в общей памяти"""
+
+    def __init__(self, configs, workers=2, slots=8):
+        """
+        Args:
+            configs: Список конфигураций детекторов (как для DetectorBank)
+            workers: Количество процессов
+            slots: Количество слотов кольца
+        """
+        self.configs = [
+            {key: config[key] for key in DetectorBank.CONFIG_KEYS if key in config}
+            for config in configs
+        ]
+        self.workers = max(1, int(workers))
+        # Не больше кадра в очереди на процесс — иначе растёт задержка до решения
+        self.max_inflight = self.workers
+        self.slots = max(self.max_inflight + 1, int(slots))
+        self.ring = None
+        self._ctx = mp.get_context("spawn")
+        self._jobs = None
+        self._results = None
+        self._processes = []
+
+        self._next_seq = 0  # Следующий кадр, результат которого отдаётся потребителю
+        self._inflight = {}  # seq -> время захвата кадра
+        self._done = {}  # seq -> (время захвата, counts, bitmask, edges), ждут своей очереди
+
+        # Статистика
+        self.submitted = 0
+        self.stale = 0
+        self.resizes = 0
+
+    def start(self):
+        self._jobs = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        for _ in range(self.workers):
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(self.configs, self._jobs, self._results),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self):
+        """Остановить процессы и освободить общую память"""
+        for _ in self._processes:
+            self._jobs.put(None)
+        for process in self._processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def _ensure_ring(self, nbytes):
+        """Кольцо под размер вырезок (пересоздаётся, только если они не помещаются)"""
+        if self.ring is not None and nbytes <= self.ring.slot_bytes:
+            return
+        # Дождаться, пока процессы отпустят старое кольцо
+        while self._inflight:
+            self._wait_result()
+        seq = -1
+        if self.ring is not None:
+            seq = self.ring.seq
+            self.ring.close()
+            self.resizes += 1
+        # С запасом: при изменении размера регионов кольцо не пересоздаётся на каждый пиксель
+        self.ring = SharedFrameRing.create(self.slots, nbytes + nbytes // 4)
+        self.ring.seq = seq
+
+    def _wait_result(self):
+        """Блокирующее ожидание результата (ошибка, если процессы детекции завершились)"""
+        while not self._receive(timeout=1.0):
+            if not any(process.is_alive() for process in self._processes):
+                raise RuntimeError("Процессы детекции завершились")
+
+    def _receive(self, timeout=None):
+        """Принять один результат (False — за timeout ничего не пришло)"""
+        try:
+            seq, counts, bitmask, edges = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        frame_time = self._inflight.pop(seq, None)
+        if counts is None:
+            self.stale += 1
+        self._done[seq] = (frame_time, counts, bitmask, edges)
+        return True
+
+    def submit(self, crops, frame_time):
+        """
+        Положить вырезки кадра в общую память и поставить их в очередь детекции
+
+        Блокируется, пока все процессы заняты или слот, в который пойдёт
+        кадр, ещё обрабатывается.
+
+        Args:
+            crops: Вырезки RGB (h, w, 3) регионов детекторов (как для
+                DetectorBank.evaluate_crops; одинаковый объект пишется один раз)
+            frame_time: Время захвата кадра
+        """
+        # Каждая вырезка пишется один раз; None и пустые детектор пропускает
+        parts = []
+        indices = []
+        for crop in crops:
+            if crop is None or crop.size == 0:
+                indices.append(None)
+                continue
+            for j, part in enumerate(parts):
+                if part is crop:
+                    break
+            else:
+                j = len(parts)
+                parts.append(crop)
+            indices.append(j)
+
+        self._ensure_ring(max(1, sum(part.nbytes for part in parts)))
+        ring = self.ring
+        reused = ring.seq + 1 - ring.slots
+        while len(self._inflight) >= self.max_inflight or reused in self._inflight:
+            self._wait_result()
+
+        seq, slot, offsets = ring.write_parts(parts)
+        layout = tuple(None if j is None else (offsets[j], parts[j].shape) for j in indices)
+        self._inflight[seq] = frame_time
+        self.submitted += 1
+        self._jobs.put((seq, ring.name, slot, layout))
+
+    def collect(self, timeout=0.0):
+        """
+        Забрать готовые результаты в порядке кадров
+
+        Args:
+            timeout: Сколько ждать первого результата, если готовых нет
+
+        Returns:
+            list: [(seq, время захвата, counts или None, bitmask или None, edges или None)]
+        """
+        while self._receive(timeout=0):
+            pass
+        if self._next_seq not in self._done and self._inflight and timeout:
+            self._receive(timeout=timeout)
+
+        ready = []
+        done = self._done
+        while self._next_seq in done:
+            frame_time, counts, bitmask, edges = done.pop(self._next_seq)
+            ready.append((self._next_seq, frame_time, counts, bitmask, edges))
+            self._next_seq += 1
+        return ready
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: workers, submitted, stale, resizes, inflight
+        """
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "stale": self.stale,
+            "resizes": self.resizes,
+            "inflight": len(self._inflight),
+        }
@@ -1,4 +1,5 @@
 import numpy as np
+from detectors.coarse_sampling import CoarseSampler
 
 class SoftPinkDetector:
     def __init__(self, config):
@@ -9,6 +10,10 @@ class SoftPinkDetector:
         self.trigger_key = config.get("trigger_key", "a")
         self._last_detected = False
 
+        # Грубая проверка по сетке (sample_stride > 1), полный проход только у порога
+        sample_stride = config.get("sample_stride", 1)
+        self.sampler = CoarseSampler(sample_stride, config.get("sample_margin", 0.5)) if sample_stride > 1 else None
+
     def get_name(self):
         return "Мягкий розовый"
 
@@ -16,6 +21,11 @@ class SoftPinkDetector:
         # frame: numpy array (BGR)
         if frame is None:
             return False
+        if self.sampler is not None:
+            detected = self.sampler.check(frame, self._count_matches, self.min_percent)
+            if detected is not None:
+                self._last_detected = detected
+                return detected
         rgb = frame[..., ::-1]  # BGR -> RGB
         mask = np.all((rgb >= self.min_rgb) & (rgb <= self.max_rgb), axis=-1)
         percent = np.mean(mask)
@@ -23,6 +33,11 @@ class SoftPinkDetector:
         self._last_detected = detected
         return detected
 
+    def _count_matches(self, pixels):
+        # pixels: numpy array (BGR)
+        rgb = pixels[..., ::-1]
+        return np.count_nonzero(np.all((rgb >= self.min_rgb) & (rgb <= self.max_rgb), axis=-1))
+
     def get_detection_message(self, r, g, b):
         return "Обнаружен мягкий розовый цвет!"
 
@@ -0,0 +1,99 @@
+"""
+Детектор для узких вертикальных полос: профиль совпадений по строкам и передний край объекта
+"""
+
+import numpy as np
+from detectors.compiled_range_detector import CompiledRangeDetector
+
+
+def resolve_trigger_row(trigger_row, height, direction):
+    """
+    Строка срабатывания для полосы высотой height
+
+    None — крайняя строка по ходу движения; отрицательные значения
+    отсчитываются от нижнего края (как индексы Python).
+    """
+    if trigger_row is None:
+        return height - 1 if direction == "down" else 0
+    if trigger_row < 0:
+        trigger_row += height
+    return min(max(int(trigger_row), 0), height - 1)
+
+
+def find_leading_edge(profile, min_count, trigger_row, direction="down"):
+    """
+    Передний край объекта по профилю строк
+
+    Args:
+        profile: Число совпавших пикселей в каждой строке (H,)
+        min_count: Минимум совпавших пикселей, чтобы строка считалась занятой
+        trigger_row: Строка срабатывания (из resolve_trigger_row)
+        direction: "down" — объекты движутся вниз, "up" — вверх
+
+    Returns:
+        tuple: (edge — координата переднего края в строках от верха кадра
+                или None, crossed — край дошёл до строки срабатывания)
+    """
+    rows = np.flatnonzero(profile >= min_count)
+    if not len(rows):
+        return None, False
+    if direction == "down":
+        # Нижняя граница самой нижней занятой строки
+        last = int(rows[-1])
+        return float(last + 1), last >= trigger_row
+    first = int(rows[0])
+    return float(first), first <= trigger_row
+
+
+class StripEdgeDetector(CompiledRangeDetector):
+    """
+    Детектор переднего края в полосе
+
+    Кадр классифицируется теми же таблицами, что и CompiledRangeDetector,
+    затем сворачивается в профиль по строкам. Срабатывание — когда передний
+    край объекта (по направлению движения) дошёл до строки trigger_row;
+    позиция края доступна в last_edge после каждого вызова detect.
+
+    Настройки:
+        trigger_row: Строка срабатывания (по умолчанию — крайняя по ходу движения)
+        direction: "down" или "up"
+        row_min_percent: Доля ширины полосы, при которой строка считается занятой
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.trigger_row = config.get("trigger_row")
+        self.direction = config.get("direction", "down")
+        if self.direction not in ("down", "up"):
+            raise ValueError(f"Неизвестное направление: {self.direction}")
+        self.row_min_percent = config.get("row_min_percent", 0.5)
+        self.last_edge = None
+        self.last_profile = None
+        self._profile_shape = None
+        self._trigger_row = None
+        self._min_count = None
+
+    def get_name(self):
+        return f"StripEdge [{self.min_rgb[0]}-{self.max_rgb[0]},{self.min_rgb[1]}-{self.max_rgb[1]},{self.min_rgb[2]}-{self.max_rgb[2]}] {self.direction}"
+
+    def row_profile(self, frame):
+        """Число совпавших пикселей в каждой строке"""
+        return np.count_nonzero(self.classify(frame), axis=1)
+
+    def detect(self, r, g, b, frame=None):
+        """Детекция по кадру (r, g, b игнорируются)"""
+        if frame is None:
+            return False
+
+        height, width = frame.shape[:2]
+        if (height, width) != self._profile_shape:
+            self._profile_shape = (height, width)
+            self._trigger_row = resolve_trigger_row(self.trigger_row, height, self.direction)
+            self._min_count = max(1, int(np.ceil(self.row_min_percent * width)))
+
+        profile = self.row_profile(frame)
+        edge, detected = find_leading_edge(profile, self._min_count, self._trigger_row, self.direction)
+        self.last_profile = profile
+        self.last_edge = edge
+        self._last_detected = detected
+        return detected
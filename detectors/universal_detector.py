@@ -2,7 +2,9 @@
 Универсальный детектор цвета на основе диапазонов RGB
 """
 
+import math
 import numpy as np
+from detectors.coarse_sampling import CoarseSampler
 
 
 class UniversalDetector:
@@ -15,6 +17,15 @@ class UniversalDetector:
         self.trigger_key = config.get("trigger_key", "a")
         self._last_detected = False
         
+        # Режим порога по количеству пикселей с ранним выходом
+        self.count_threshold = config.get("count_threshold", False)
+        self.row_block = max(1, int(config.get("row_block", 16)))
+        self._required_counts = {}  # (H, W) -> минимальное число совпавших пикселей
+        
+        # Грубая проверка по сетке (sample_stride > 1), полный проход только у порога
+        sample_stride = config.get("sample_stride", 1)
+        self.sampler = CoarseSampler(sample_stride, config.get("sample_margin", 0.5)) if sample_stride > 1 else None
+        
         # Предварительное создание масок для скорости
         self._min_rgb_broadcast = self.min_rgb.reshape(1, 1, 3)
         self._max_rgb_broadcast = self.max_rgb.reshape(1, 1, 3)
@@ -27,6 +38,17 @@ class UniversalDetector:
         if frame is None:
             return False
         
+        if self.sampler is not None:
+            detected = self.sampler.check(frame, self._count_matches, self.min_percent)
+            if detected is not None:
+                self._last_detected = detected
+                return detected
+        
+        if self.count_threshold:
+            detected = self._detect_by_count(frame)
+            self._last_detected = detected
+            return detected
+        
         # Векторизованная операция (максимально быстро)
         mask = np.all((frame >= self._min_rgb_broadcast) & (frame <= self._max_rgb_broadcast), axis=2)
         percent = np.mean(mask)
@@ -35,6 +57,49 @@ class UniversalDetector:
         
         return detected
     
+    def _count_matches(self, pixels):
+        """Число пикселей в диапазоне"""
+        return np.count_nonzero(np.all((pixels >= self._min_rgb_broadcast) & (pixels <= self._max_rgb_broadcast), axis=2))
+    
+    def _required_count(self, height, width):
+        """Минимальное число совпавших пикселей для области (кэшируется по размеру)"""
+        key = (height, width)
+        required = self._required_counts.get(key)
+        if required is None:
+            # Эквивалент np.mean(mask) >= min_percent (с допуском на погрешность float)
+            required = max(0, math.ceil(self.min_percent * height * width - 1e-9))
+            self._required_counts[key] = required
+        return required
+    
+    def _detect_by_count(self, frame):
+        """Подсчёт совпадений блоками строк с выходом, как только исход известен"""
+        height, width = frame.shape[:2]
+        required = self._required_count(height, width)
+        if required == 0:
+            return True
+        
+        count = 0
+        remaining = height * width
+        row_block = self.row_block
+        min_rgb, max_rgb = self._min_rgb_broadcast, self._max_rgb_broadcast
+        
+        # Блоки растут вдвое: положительный кадр решается по первым строкам,
+        # а полный проход отрицательного кадра стоит лишь O(log H) вызовов numpy
+        top = 0
+        while top < height:
+            block = frame[top:top + row_block]
+            count += np.count_nonzero(np.all((block >= min_rgb) & (block <= max_rgb), axis=2))
+            if count >= required:
+                return True
+            remaining -= block.shape[0] * width
+            # Даже если все оставшиеся пиксели совпадут — порог не набрать
+            if count + remaining < required:
+                return False
+            top += row_block
+            row_block *= 2
+        
+        return False
+    
     def get_detection_message(self, r, g, b):
         return f"Обнаружен цвет"
     
@@ -5,10 +5,27 @@
 import config
 from ui.overlay import DraggableOverlay
 from capture.screen_capture import ScreenCapture
+from capture.frame_source import DxcamFrameSource
 from detectors.blue_detector import BlueDetector
 import json
 from detectors.soft_pink_detector import SoftPinkDetector
 from detectors.universal_detector import UniversalDetector
+from detectors.compiled_range_detector import CompiledRangeDetector
+from detectors.color_space_detector import ColorSpaceLutDetector
+from detectors.color_distance_detector import ColorDistanceDetector
+from detectors.strip_edge_detector import StripEdgeDetector
+from utils.trace_recorder import enable_tracing
+from utils.metrics_server import start_metrics_server
+
+
+# Типы детекторов для поля "type" в detector_config.json
+DETECTOR_TYPES = {
+    "universal": UniversalDetector,
+    "compiled": CompiledRangeDetector,
+    "color_space": ColorSpaceLutDetector,
+    "distance": ColorDistanceDetector,
+    "strip_edge": StripEdgeDetector,
+}
 
 
 def print_startup_info(detector):
@@ -29,7 +46,8 @@ def create_detector():
     # Загрузка настроек из detector_config.json
     with open("detector_config.json", "r", encoding="utf-8") as f:
         config = json.load(f)
-    return UniversalDetector(config)
+    detector_class = DETECTOR_TYPES.get(config.get("type", "universal"), UniversalDetector)
+    return detector_class(config)
     
     # Примеры других детекторов (раскомментируйте нужный):
     # from detectors.red_detector import RedDetector
@@ -41,6 +59,9 @@ def create_detector():
 
 def main():
     """Главная функция приложения"""
+    # Трассировка включается до создания UI и захвата — они берут буфер при инициализации
+    tracer = enable_tracing(config.TRACE_CAPACITY) if config.TRACE_PATH else None
+    
     # Создание детектора
     detector = create_detector()
     
@@ -58,17 +79,36 @@ def main():
         border_width=detector_config.get("border_width", config.BORDER_WIDTH)
     )
 
-    # Используем dxcam (поддерживает до 4 экземпляров через device_idx)
+    # Используем dxcam (один общий захват на монитор для всех экземпляров)
+    source = DxcamFrameSource(
+        output_idx=0,
+        target_fps=config.TARGET_FPS,
+        window_margin=config.CAPTURE_WINDOW_MARGIN,
+        full_output=config.CAPTURE_FULL_OUTPUT
+    )
     capture = ScreenCapture(
         overlay=overlay,
         detector=detector,
+        source=source,
         target_fps=config.TARGET_FPS,
-        log_interval=config.LOG_EVERY_N_FRAMES
+        log_interval=config.LOG_EVERY_N_FRAMES,
+        record_path=config.RECORD_PATH,
+        record_capacity=config.RECORD_CAPACITY,
+        skip_duplicates=config.SKIP_DUPLICATE_FRAMES,
+        change_gate_stride=config.CHANGE_GATE_STRIDE,
+        pacer_spin_us=config.PACER_SPIN_US
     )
 
     # Передаем ссылку на захватчик в overlay для управления кнопкой
     overlay.set_capture_ref(capture)
     
+    # Метрики для наблюдения за долгими сессиями
+    if config.METRICS_PORT:
+        metrics = start_metrics_server(config.METRICS_PORT)
+        metrics.register(capture.collect_metrics)
+        if capture.key_dispatcher:
+            metrics.register(capture.key_dispatcher.collect_metrics)
+    
     # Запуск захвата
     capture.start()
     
@@ -79,7 +119,12 @@ def main():
         pass
     finally:
         capture.stop()
+        # Дожидаемся отпускания клавиши: поток диспетчера — демон и не переживёт выход
+        if capture.key_dispatcher:
+            capture.key_dispatcher.stop()
         overlay.destroy()
+        if tracer is not None:
+            tracer.dump(config.TRACE_PATH)
 
 
 if __name__ == "__main__":
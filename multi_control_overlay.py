@@ -6,14 +6,17 @@ import tkinter as tk
 from tkinter import ttk
 import json
 import os
+from ui.state_channel import UIStatePoller
 
 
 class MultiControlOverlay:
     """Управляющая панель для 4 детекторов"""
     
-    def __init__(self, detectors_data):
+    def __init__(self, detectors_data, ui_rate_hz=30):
         self.detectors_data = detectors_data
         self.detector_refs = []  # Ссылки на экземпляры детекторов
+        self.ui_rate_hz = ui_rate_hz
+        self.ui_poller = None
         
         # Увеличенные размеры панели
         self.panel_width = 140
@@ -230,6 +233,34 @@ class MultiControlOverlay:
         """Установить ссылки на детекторы"""
         self.detector_refs = refs
     
+    def attach_ui_states(self, states):
+        """
+        Отображать состояния детекторов (DetectorUIState), которые пишут потоки захвата
+        
+        Args:
+            states: Список DetectorUIState в порядке детекторов
+        """
+        if self.ui_poller is None:
+            self.ui_poller = UIStatePoller(self.root, rate_hz=self.ui_rate_hz)
+        for idx, state in enumerate(states):
+            self.ui_poller.add(
+                state,
+                on_pressed=lambda value, idx=idx: self.update_key_indicator(idx, value),
+                on_center_rgb=lambda rgb, idx=idx: self._set_color_display(idx, rgb),
+                on_active=lambda value, idx=idx: self._set_active_display(idx, value)
+            )
+        self.ui_poller.start()
+    
+    def _set_color_display(self, idx, rgb):
+        """Обновить квадрат цвета (пока цвет не измерен — не трогаем)"""
+        if rgb is not None:
+            self.update_detector_color(idx, rgb)
+    
+    def _set_active_display(self, idx, value):
+        """Обновить чекбокс активности детектора"""
+        if idx < len(self.detector_widgets):
+            self.detector_widgets[idx]['active_var'].set(value)
+    
     def update_detector_color(self, idx, rgb):
         """Обновить цвет детектора"""
         if idx < len(self.detector_widgets):
@@ -249,6 +280,8 @@ class MultiControlOverlay:
     
     def destroy(self):
         self._save_position()
+        if self.ui_poller:
+            self.ui_poller.stop()
         try:
             self.root.quit()
             self.root.destroy()
@@ -1,12 +1,28 @@
 """
 Запуск 4 экземпляров детекторов с индивидуальными оверлеями
+
+keyboard, tkinter и движок захвата (dxcam) импортируются внутри функций:
+процессы детекции (spawn) заново импортируют этот модуль как __mp_main__
+и не должны тянуть за собой UI и захват экрана.
 """
 
 import json
+import math
+import multiprocessing
 import os
 import threading
-import keyboard
-from ui.overlay import DraggableOverlay
+import time
+from collections import deque
+from detectors.detector_bank import DetectorBank, crop_regions
+from detectors.process_pool import DetectorProcessPool
+from detectors.strip_edge_detector import resolve_trigger_row
+from utils.frame_gate import FrameChangeGate
+from utils.frame_pacer import FramePacer
+from utils.key_dispatcher import get_key_dispatcher
+from utils.edge_predictor import EdgeMotionTracker, TimingErrorStats
+from utils.latency_histogram import LatencyStats
+from utils.trace_recorder import enable_tracing, get_tracer
+from utils.metrics_server import histogram_metrics, start_metrics_server
 
 
 class MultiDetectorCapture:
@@ -15,22 +31,346 @@ class MultiDetectorCapture:
     def __init__(self, detector_id, config):
         self.detector_id = detector_id
         self.config = config
-        self.active = config['active']
         self.trigger_key = config['trigger_key']
         self.min_rgb = tuple(config['min_rgb'])
         self.max_rgb = tuple(config['max_rgb'])
         
         self.overlay = None
         self.running = False
+        
+        # Общий движок захвата (один кадр на все детекторы)
+        self.engine = None
+        self._engine_handle = None
+        self._active = config['active']
+        
+        # Конечный автомат нажатия: сколько кадров подряд нужно для нажатия/отпускания
+        self.press_after_hits = config.get('press_after_hits', 1)
+        self.release_after_misses = config.get('release_after_misses', 1)
+        self.key_dispatcher = None
+        self.pressed = False
+        self._pressed_key = None
+        self._hit_streak = 0
+        self._miss_streak = 0
+        
+        # Статистика
+        self.frame_count = 0
+        self.hit_count = 0
+        self.press_count = 0
+        self.fps_counter = deque(maxlen=30)  # Моменты обработки последних кадров (perf_counter)
+        
+        # Задержки по этапам, отсчёт от момента захвата кадра
+        self.latency = LatencyStats(f"Детектор {detector_id}")
+        self._lat_decision = self.latency.stage("захват -> решение")
+        self._lat_key = self.latency.stage("захват -> эмуляция клавиши")
+        self._lat_ui = self.latency.stage("захват -> отрисовка индикатора")
+        self._origin_ns = None
+        self.last_edge = None
+        
+        # Упреждающее нажатие по скорости переднего края (режим trigger_row + predictive)
+        self.tracker = None
+        if config.get('predictive') and 'trigger_row' in config:
+            self.tracker = EdgeMotionTracker(
+                direction=config.get('direction', 'down'),
+                history=config.get('predict_history', 4),
+                max_gap=config.get('predict_max_gap', 0.2),
+                min_speed=config.get('predict_min_speed', 20.0),
+            )
+        self.predict_horizon = config.get('predict_horizon', 0.25)  # Насколько вперёд планировать (с)
+        self.key_lead = config.get('key_lead', 0.0)  # Поправка на задержку ОС при эмуляции (с)
+        self.timing = TimingErrorStats(f"Детектор {detector_id}")
+        self.predicted_presses = 0
+        self.false_predictions = 0
+        self._edge_target = None
+        self._target_height = None
+        # Цикл нажатия: токен диспетчера для плана и/или реактивного нажатия
+        self._token = None
+        self._plan_pending = False  # План может ещё ждать своего момента в диспетчере
+        self._predicted = False  # Нажатие текущего цикла сделано по прогнозу
+        self._press_ns = None  # Момент нажатия цикла (0 — без нажатия), None — неизвестен
+        self._crossing_ns = None  # Оценка момента пересечения в текущем цикле (0 — не оценить)
+        self._timing_recorded = False
+    
+    @property
+    def active(self):
+        return self._active
+    
+    @active.setter
+    def active(self, value):
+        """Неактивный детектор исключается из объединённой области захвата"""
+        self._active = value
+        self.refresh_region()
+        # Запланированное нажатие выключенного детектора не должно сработать
+        if not value and self._plan_pending and self.key_dispatcher:
+            self.key_dispatcher.cancel_scheduled(self._token)
+        # Чекбокс обновит UI-поток при следующем опросе состояния
+        if self.overlay:
+            self.overlay.ui_state.active = value
+    
+    def attach_capture_engine(self, engine):
+        """Подключить детектор к общему движку захвата"""
+        self.engine = engine
+        self._engine_handle = engine.register()
+        self.refresh_region()
+    
+    def detach_capture_engine(self):
+        """Отключить детектор от общего движка захвата"""
+        if self.engine is not None:
+            self.engine.unregister(self._engine_handle)
+            self.engine = None
+            self._engine_handle = None
+    
+    def refresh_region(self):
+        """Передать текущий регион в общий движок захвата"""
+        if self.engine is not None:
+            region = self.get_position() if self._active else None
+            self.engine.update_region(self._engine_handle, region)
+    
+    def region_slice(self, frame_region):
+        """
+        Срез области детектора внутри общего кадра
+        
+        Args:
+            frame_region: (x1, y1, x2, y2) общего кадра
+        
+        Returns:
+            tuple: (y1, y2, x1, x2) относительно кадра или None
+        """
+        if not self._active or frame_region is None:
+            return None
+        region = self.get_position()
+        if region is None:
+            return None
+        fx1, fy1, fx2, fy2 = frame_region
+        x1, y1, x2, y2 = region
+        if x1 < fx1 or y1 < fy1 or x2 > fx2 or y2 > fy2:
+            return None
+        return (y1 - fy1, y2 - fy1, x1 - fx1, x2 - fx1)
+    
+    def update_detection(self, hit, frame_time, now, edge=None):
+        """
+        Шаг конечного автомата нажатия по результату кадра
+        
+        Args:
+            hit: Детектор сработал на кадре
+            frame_time: Время захвата кадра (perf_counter)
+            now: Время принятия решения (perf_counter)
+            edge: Позиция переднего края в регионе (режим trigger_row) или None
+        """
+        self.frame_count += 1
+        self.fps_counter.append(now)
+        self.last_edge = edge
+        self._origin_ns = int(frame_time * 1e9)
+        self._lat_decision.record(int(now * 1e9) - self._origin_ns)
+        
+        # Нажали заранее, объект ещё подходит к строке — это не промах
+        awaiting = self.tracker is not None and self._update_prediction(hit, frame_time, now, edge)
+        
+        if hit:
+            self.hit_count += 1
+            self._hit_streak += 1
+            self._miss_streak = 0
+        elif awaiting:
+            self._miss_streak = 0
+        else:
+            self._miss_streak += 1
+            self._hit_streak = 0
+        
+        # Клавишу сменили в UI, пока она была нажата — отпускаем старую
+        if self.pressed and self._pressed_key != self.trigger_key:
+            self.release_key()
+        
+        if not self.pressed:
+            if self._active and self._hit_streak >= self.press_after_hits:
+                self.press_key()
+        elif not self._active or self._miss_streak >= self.release_after_misses:
+            self.release_key()
+    
+    def _update_edge_target(self):
+        """Позиция края, соответствующая пересечению строки срабатывания"""
+        region = self.get_position()
+        if region is None:
+            return self._edge_target
+        height = region[3] - region[1]
+        if height != self._target_height:
+            self._target_height = height
+            direction = self.config.get('direction', 'down')
+            row = resolve_trigger_row(self.config['trigger_row'], height, direction)
+            # Край "down" — нижняя граница занятой строки (как в find_leading_edge)
+            self._edge_target = row + 1 if direction == 'down' else row
+        return self._edge_target
+    
+    def _update_prediction(self, hit, frame_time, now, edge):
+        """
+        Шаг упреждающего режима: уточнение плана нажатия и замер ошибки момента
+        
+        Returns:
+            bool: Клавиша нажата заранее и пересечение ещё не наступило
+        """
+        tracker = self.tracker
+        target = self._update_edge_target()
+        
+        if edge is None:
+            tracker.reset()
+        else:
+            if hit and self._crossing_ns is None and target is not None:
+                # Первый кадр с пересечением: момент — интерполяция между соседними кадрами
+                crossing = tracker.interpolate_crossing(frame_time, edge, target)
+                self._crossing_ns = int(crossing * 1e9) if crossing is not None else 0
+            tracker.update(frame_time, edge)
+        
+        self._poll_press()
+        
+        # План держится, только пока детектор включён, клавиша не нажата,
+        # а объект движется к строке и ещё не пересёк её
+        crossing = None
+        if self._active and not self.pressed and not hit and edge is not None and target is not None:
+            crossing = tracker.predict_crossing(target)
+            if crossing is not None and crossing - now > self.predict_horizon:
+                crossing = None
+        if crossing is not None:
+            if self._token is None:
+                self._token = self.key_dispatcher.new_token()
+            self.key_dispatcher.schedule_press(self.trigger_key, int((crossing - self.key_lead) * 1e9),
+                                               self._origin_ns, self._lat_key, self._token)
+            self._plan_pending = True
+        elif self._plan_pending:
+            self._cancel_plan()
+        
+        if self._press_ns and self._crossing_ns and not self._timing_recorded:
+            self.timing.record(self._press_ns - self._crossing_ns)
+            self._timing_recorded = True
+        
+        return self.pressed and not hit and self._crossing_ns is None and tracker.approaching()
+    
+    def _poll_press(self):
+        """Забрать у диспетчера момент нажатия текущего цикла (план или реактивное)"""
+        if self._token is None or self._press_ns is not None:
+            return
+        pressed_ns = self.key_dispatcher.plan_result(self._token)
+        if pressed_ns is None:
+            return
+        planned = self._plan_pending
+        self._plan_pending = False
+        self._press_ns = pressed_ns
+        if pressed_ns and planned and not self.pressed:
+            # Запланированное нажатие выполнено потоком диспетчера
+            self._pressed_key = self.trigger_key
+            self._predicted = True
+            self.pressed = True
+            self.press_count += 1
+            self.predicted_presses += 1
+            if self.overlay:
+                self.overlay.ui_state.set_pressed(True, self._origin_ns)
+    
+    def _cancel_plan(self):
+        """Снять план; если он успел выполниться — учесть нажатие"""
+        self.key_dispatcher.cancel_scheduled(self._token)
+        self._poll_press()
+        self._plan_pending = False
     
-    def create_overlay(self, border_width):
-        """Создать оверлей для этого детектора"""
+    def press_key(self):
+        """Нажать клавишу детектора (через поток диспетчера)"""
+        token = None
+        if self.tracker is not None:
+            # Реактивное нажатие: прогноз не успел — план больше не нужен
+            if self._plan_pending:
+                self._cancel_plan()
+                if self.pressed:
+                    return
+            if self._token is None:
+                self._token = self.key_dispatcher.new_token()
+            token = self._token
+        self._pressed_key = self.trigger_key
+        self.key_dispatcher.press(self._pressed_key, self._origin_ns, self._lat_key, token)
+        self.pressed = True
+        self.press_count += 1
+        if self.overlay:
+            self.overlay.ui_state.set_pressed(True, self._origin_ns)
+    
+    def release_key(self):
+        """Отпустить клавишу детектора"""
+        if not self.pressed:
+            return
+        self.key_dispatcher.release(self._pressed_key, self._origin_ns, self._lat_key)
+        if self.tracker is not None:
+            if self._predicted and self._crossing_ns is None:
+                self.false_predictions += 1  # Нажали заранее, а объект так и не дошёл до строки
+            if self._plan_pending:
+                self.key_dispatcher.cancel_scheduled(self._token)
+            if self._token is not None:
+                self.key_dispatcher.plan_result(self._token)
+            self._token = None
+            self._plan_pending = False
+            self._predicted = False
+            self._press_ns = None
+            self._crossing_ns = None
+            self._timing_recorded = False
+        self.pressed = False
+        self._pressed_key = None
+        if self.overlay:
+            self.overlay.ui_state.set_pressed(False, self._origin_ns)
+    
+    def _calculate_average_fps(self):
+        """Средний FPS по последним кадрам (0, если кадров давно не было)"""
+        if len(self.fps_counter) < 2 or time.perf_counter() - self.fps_counter[-1] > 1.0:
+            return 0
+        span = self.fps_counter[-1] - self.fps_counter[0]
+        return (len(self.fps_counter) - 1) / span if span > 0 else 0
+    
+    def collect_metrics(self):
+        """
+        Счётчики детектора для сервера метрик
+        
+        Returns:
+            list: записи (name, type, help, labels, value)
+        """
+        labels = {"detector": str(self.detector_id), "backend": "MultiDetectorSystem"}
+        metrics = [
+            ("pyt_frames_total", "counter", "Обработанные кадры", labels, self.frame_count),
+            ("pyt_detections_total", "counter", "Кадры со срабатыванием детектора", labels, self.hit_count),
+            ("pyt_key_presses_total", "counter", "Нажатия клавиши", labels, self.press_count),
+            ("pyt_fps", "gauge", "Текущий FPS обработки", labels,
+             self._calculate_average_fps()),
+            ("pyt_active", "gauge", "Детектор включён", labels, int(bool(self._active))),
+        ]
+        for stage, histogram in list(self.latency.stages.items()):
+            metrics.extend(histogram_metrics("pyt_stage_latency_seconds", "Задержка этапа конвейера",
+                                             histogram, dict(labels, stage=stage)))
+        if self.tracker is not None:
+            metrics.extend([
+                ("pyt_predicted_presses_total", "counter", "Нажатия по прогнозу пересечения", labels,
+                 self.predicted_presses),
+                ("pyt_false_predictions_total", "counter", "Нажатия по прогнозу без пересечения", labels,
+                 self.false_predictions),
+            ])
+            for side, histogram in (("early", self.timing.early), ("late", self.timing.late)):
+                metrics.extend(histogram_metrics("pyt_press_timing_error_seconds",
+                                                 "Ошибка момента нажатия относительно пересечения",
+                                                 histogram, dict(labels, side=side)))
+        return metrics
+    
+    def print_statistics(self, elapsed):
+        """Вывод статистики детектора"""
+        fps = self.frame_count / elapsed if elapsed > 0 else 0
+        print(f"[Детектор {self.detector_id}] кадров: {self.frame_count} ({fps:.1f} FPS), "
+              f"срабатываний: {self.hit_count}, нажатий: {self.press_count}")
+        print(self.latency.format())
+        if self.tracker is not None:
+            print(f"[Детектор {self.detector_id}] по прогнозу: {self.predicted_presses}, "
+                  f"ложных прогнозов: {self.false_predictions}")
+            print(self.timing.format())
+    
+    def create_overlay(self, border_width, master=None):
+        """Создать оверлей для этого детектора (Toplevel общего корня master)"""
+        from ui.overlay import DraggableOverlay
         self.overlay = DraggableOverlay(
             width=self.config['width'],
             height=self.config['height'],
-            border_width=border_width
+            border_width=border_width,
+            master=master
         )
         self.overlay.set_capture_ref(self)
+        self.overlay.ui_state.ui_latency = self._lat_ui
         
         # Загружаем позицию для этого детектора
         self._load_overlay_position()
@@ -44,12 +384,12 @@ class MultiDetectorCapture:
                     pos = json.load(f)
                 x = pos.get("x", 100 + (self.detector_id - 1) * 250)
                 y = pos.get("y", 100 + (self.detector_id - 1) * 50)
-                self.overlay.root.geometry(f'+{x}+{y}')
+                self.overlay.move_to(x, y)
             else:
                 # Расположим детекторы по умолчанию со смещением
                 x = 100 + (self.detector_id - 1) * 250
                 y = 100 + (self.detector_id - 1) * 50
-                self.overlay.root.geometry(f'+{x}+{y}')
+                self.overlay.move_to(x, y)
         except:
             pass
     
@@ -74,13 +414,11 @@ class MultiDetectorCapture:
     def update_color_display(self, rgb):
         """Обновить отображение цвета"""
         if self.overlay:
-            self.overlay.update_border_color(None, rgb)
+            self.overlay.ui_state.center_rgb = rgb
     
     def toggle_active(self):
         """Переключить активность детектора"""
         self.active = not self.active
-        if self.overlay and hasattr(self.overlay, 'active_var'):
-            self.overlay.active_var.set(self.active)
 
 
 class MultiDetectorSystem:
@@ -93,6 +431,28 @@ class MultiDetectorSystem:
         
         self.detectors = []
         self.running = True
+        self.engine = None
+        self._frame_seq = -1
+        self.root = None
+        self.worker = None
+        self.process_pool = None
+        self.key_dispatcher = None
+        self.start_time = None
+        self.last_frame = None
+        self.last_frame_time = 0.0
+        self._last_ui_update = 0.0
+        
+        # Задержки общих этапов (захват и детекция одного кадра на все детекторы)
+        self.latency = LatencyStats("Общий кадр")
+        self._lat_acquire = self.latency.stage("захват -> получение кадра")
+        self._lat_detect = self.latency.stage("детекция (банк)")
+        self._lat_pool = self.latency.stage("захват -> результат процессов")
+        self.tracer = None
+        
+        # Повторный кадр с теми же регионами — результат банка не меняется
+        self._last_regions = None
+        self._last_result = None
+        self.duplicate_frames = 0
         
         # Создание детекторов
         for detector_config in self.config['detectors']:
@@ -102,7 +462,14 @@ class MultiDetectorSystem:
             )
             self.detectors.append(detector)
         
+        # Сравниваются только регионы детекторов, а не всё окно захвата
+        self._change_gates = [FrameChangeGate() for _ in self.detectors]
+        
+        # Все диапазоны проверяются за один проход по общему кадру
+        self.detector_bank = DetectorBank(self.config['detectors'])
+        
         # Настройка горячей клавиши F8 для переключения всех детекторов
+        import keyboard
         keyboard.add_hotkey('f8', self._toggle_all_detectors)
     
     def _toggle_all_detectors(self):
@@ -113,32 +480,296 @@ class MultiDetectorSystem:
         
         for detector in self.detectors:
             detector.active = new_state
-            if detector.overlay and hasattr(detector.overlay, 'active_var'):
-                detector.overlay.active_var.set(new_state)
     
     def start(self):
         """Запустить систему"""
         border_width = self.config['global_settings']['border_width']
+        fps_limit = self.config['global_settings'].get('fps_limit', 90)
+        
+        # Трассировка включается до создания оверлеев и потоков (они берут буфер при инициализации)
+        trace_path = self.config['global_settings'].get('trace_path')
+        if trace_path:
+            enable_tracing()
+        
+        import tkinter as tk
+        from capture.shared_capture import get_capture_engine
+        
+        # Один интерпретатор Tk на всю систему: скрытый корень и Toplevel на каждый оверлей
+        self.root = tk.Tk()
+        self.root.withdraw()
         
         # Создаём оверлеи для каждого детектора
         for detector in self.detectors:
-            detector.create_overlay(border_width)
+            detector.create_overlay(border_width, master=self.root)
         
-        # Запускаем главный цикл первого оверлея (все остальные будут работать параллельно)
+        # Один движок захвата на все детекторы (камера стартует при первом запросе кадра)
+        self.engine = get_capture_engine(
+            output_idx=0,
+            target_fps=fps_limit,
+            window_margin=self.config['global_settings'].get('capture_window_margin', 200),
+            full_output=self.config['global_settings'].get('capture_full_output', False)
+        )
+        for detector in self.detectors:
+            detector.attach_capture_engine(self.engine)
+        
+        # Единый поток захвата/детекции для всех детекторов
+        self.tracer = get_tracer()
+        if self.tracer is not None:
+            self._tr_detect = self.tracer.name_id("detect_bank")
+        self.key_dispatcher = get_key_dispatcher()
+        for detector in self.detectors:
+            detector.key_dispatcher = self.key_dispatcher
+        # Опционально: детекция в отдельных процессах (кадры через общую память)
+        processes = self.config['global_settings'].get('detector_processes', 0)
+        loop = self._detection_loop
+        if processes > 0:
+            self.process_pool = DetectorProcessPool(self.config['detectors'], workers=processes)
+            self.process_pool.start()
+            loop = self._process_pool_loop
+        
+        self.start_time = time.perf_counter()
+        self.worker = threading.Thread(
+            target=loop,
+            args=(fps_limit,),
+            daemon=True
+        )
+        self.worker.start()
+        
+        metrics_port = self.config['global_settings'].get('metrics_port')
+        if metrics_port:
+            metrics = start_metrics_server(metrics_port)
+            metrics.register(self.collect_metrics)
+            metrics.register(self.key_dispatcher.collect_metrics)
+        
+        # Один главный цикл обслуживает все оверлеи
         try:
-            if self.detectors:
-                self.detectors[0].overlay.run()
+            self.root.mainloop()
         except KeyboardInterrupt:
             pass
         finally:
             self.cleanup()
     
+    def _grab_shared_frame(self):
+        """
+        Получить новый общий кадр и вырезки регионов детекторов
+        
+        Returns:
+            tuple: (crops — view регионов в кадре, regions — срезы (y1, y2, x1, x2))
+            или (None, None), если кадра нет
+        """
+        for detector in self.detectors:
+            detector.refresh_region()
+        frame, frame_region, self._frame_seq, frame_time = self.engine.get_shared_frame(self._frame_seq)
+        if frame is None:
+            return None, None
+        self.last_frame = frame
+        self.last_frame_time = frame_time
+        self._lat_acquire.record(time.perf_counter_ns() - int(frame_time * 1e9))
+        regions = [detector.region_slice(frame_region) for detector in self.detectors]
+        return crop_regions(frame, regions), regions
+    
+    def _is_duplicate(self, crops, regions):
+        """Регионы те же и их содержимое не изменилось с прошлого кадра"""
+        duplicate = regions == self._last_regions
+        # Проверяются все регионы: каждый фильтр запоминает свою вырезку;
+        # одинаковый регион (тот же объект вырезки) сравнивается один раз
+        checked = []
+        for gate, crop in zip(self._change_gates, crops):
+            if crop is None or any(crop is seen for seen in checked):
+                gate.reset()
+                continue
+            checked.append(crop)
+            if not gate.is_duplicate(crop):
+                duplicate = False
+        return duplicate
+    
+    def detect_all(self):
+        """
+        Проверить все детекторы по одному общему кадру
+        
+        Returns:
+            tuple: (counts — совпавшие пиксели по детекторам,
+                    bitmask — биты сработавших детекторов) или None, если кадра нет
+        """
+        if self.engine is None:
+            return None
+        crops, regions = self._grab_shared_frame()
+        if crops is None:
+            return None
+        if self._is_duplicate(crops, regions):
+            self.duplicate_frames += 1
+            return self._last_result
+        self._last_regions = regions
+        start_ns = time.perf_counter_ns()
+        self._last_result = self.detector_bank.evaluate_crops(crops)
+        end_ns = time.perf_counter_ns()
+        self._lat_detect.record(end_ns - start_ns)
+        if self.tracer is not None:
+            self.tracer.add(self._tr_detect, start_ns, end_ns)
+        return self._last_result
+    
+    def _detection_loop(self, fps_limit):
+        """Поток захвата и детекции: один общий кадр обслуживает все детекторы"""
+        pacer = FramePacer(fps_limit)
+        perf_counter = time.perf_counter
+        tracer = get_tracer()
+        if tracer is not None:
+            tr_loop = tracer.name_id("detection_loop")
+        
+        while self.running:
+            if tracer is not None:
+                loop_start = time.perf_counter_ns()
+            
+            # get_latest_frame камеры в режиме видео сам ждёт новый кадр — отдельная пауза не нужна
+            result = self.detect_all()
+            if result is None:
+                # Кадра нет (камера не запущена / регионы вне окна) — не крутимся вхолостую
+                pacer.wait()
+                continue
+            
+            _, bitmask = result
+            now = perf_counter()
+            edges = self.detector_bank.edges
+            for i, detector in enumerate(self.detectors):
+                edge = edges[i]
+                detector.update_detection(bool(bitmask >> i & 1), self.last_frame_time, now,
+                                          None if math.isnan(edge) else float(edge))
+            
+            # Цвет в центре области — раз в секунду
+            if now - self._last_ui_update >= 1.0:
+                self._last_ui_update = now
+                self._update_color_displays()
+            
+            if tracer is not None:
+                tracer.add(tr_loop, loop_start)
+        
+        for detector in self.detectors:
+            detector.release_key()
+    
+    def _process_pool_loop(self, fps_limit):
+        """
+        Поток захвата при детекции в процессах
+        
+        Вырезки регионов копируются в кольцо общей памяти и сразу отдаются процессам;
+        пока они считают, поток уже захватывает следующий кадр. Решения
+        применяются по мере готовности результатов в порядке кадров.
+        """
+        pacer = FramePacer(fps_limit)
+        perf_counter = time.perf_counter
+        pool = self.process_pool
+        
+        while self.running:
+            crops, regions = self._grab_shared_frame()
+            if crops is None:
+                self._apply_pool_results(pool.collect(), perf_counter())
+                pacer.wait()
+                continue
+            
+            if self._is_duplicate(crops, regions):
+                # Повтор кадра: результат не изменится, процессы не загружаем
+                self.duplicate_frames += 1
+            else:
+                self._last_regions = regions
+                pool.submit(crops, self.last_frame_time)
+            
+            now = perf_counter()
+            self._apply_pool_results(pool.collect(), now)
+            
+            if now - self._last_ui_update >= 1.0:
+                self._last_ui_update = now
+                self._update_color_displays()
+        
+        for detector in self.detectors:
+            detector.release_key()
+    
+    def _apply_pool_results(self, results, now):
+        """Применить результаты процессов-детекторов к конечным автоматам нажатия"""
+        for _, frame_time, counts, bitmask, edges in results:
+            if counts is None:
+                continue
+            self._lat_pool.record(int(now * 1e9) - int(frame_time * 1e9))
+            for i, detector in enumerate(self.detectors):
+                edge = edges[i]
+                detector.update_detection(bool(bitmask >> i & 1), frame_time, now,
+                                          None if math.isnan(edge) else float(edge))
+    
+    def _update_color_displays(self):
+        """Передать цвет центрального пикселя каждого детектора в UI"""
+        frame = self.last_frame
+        for detector, region in zip(self.detectors, self._last_regions or ()):
+            if region is None:
+                continue
+            y1, y2, x1, x2 = region
+            center_rgb = tuple(map(int, frame[(y1 + y2) // 2, (x1 + x2) // 2]))
+            detector.update_color_display(center_rgb)
+    
+    def print_statistics(self):
+        """Вывод статистики по всем детекторам"""
+        if self.start_time is None:
+            return
+        elapsed = time.perf_counter() - self.start_time
+        print("\n=== СТАТИСТИКА ===")
+        print(f"Время работы: {elapsed:.2f} секунд")
+        print(f"Захватов кадра: {self.engine.grab_count}, повторных кадров: {self.duplicate_frames}")
+        for detector in self.detectors:
+            detector.print_statistics(elapsed)
+        if self.process_pool:
+            stats = self.process_pool.get_stats()
+            print(f"Процессов детекции: {stats['workers']}, кадров отправлено: {stats['submitted']}, "
+                  f"устаревших результатов: {stats['stale']}, пересозданий кольца: {stats['resizes']}")
+        print(self.latency.format())
+        print("  " + self.key_dispatcher.latency.format())
+        if self.key_dispatcher.schedule_latency.count:
+            print("  " + self.key_dispatcher.schedule_latency.format())
+    
+    def collect_metrics(self):
+        """
+        Метрики всей системы: общий захват и каждый детектор
+        
+        Returns:
+            list: записи (name, type, help, labels, value)
+        """
+        labels = {"backend": "MultiDetectorSystem"}
+        metrics = [
+            ("pyt_frames_grabbed_total", "counter", "Захваченные общие кадры", labels,
+             self.engine.grab_count if self.engine else 0),
+            ("pyt_duplicate_frames_total", "counter", "Повторные кадры без детекции", labels, self.duplicate_frames),
+        ]
+        for stage, histogram in list(self.latency.stages.items()):
+            metrics.extend(histogram_metrics("pyt_stage_latency_seconds", "Задержка этапа конвейера",
+                                             histogram, dict(labels, stage=stage)))
+        for detector in self.detectors:
+            metrics.extend(detector.collect_metrics())
+        return metrics
+    
+    def get_latency_report(self):
+        """Текущий отчёт о задержках: общие этапы и каждый детектор"""
+        lines = [self.latency.format()]
+        lines.extend(detector.latency.format() for detector in self.detectors)
+        if self.key_dispatcher:
+            lines.append("  " + self.key_dispatcher.latency.format())
+        return "\n".join(lines)
+    
+    def print_latency_report(self):
+        print(self.get_latency_report())
+    
     def cleanup(self):
         """Очистка ресурсов"""
         self.running = False
+        if self.worker:
+            self.worker.join(timeout=1.0)
+            self.worker = None
+        if self.process_pool:
+            self.process_pool.stop()
+        if self.key_dispatcher:
+            self.key_dispatcher.stop()
+        self.print_statistics()
+        if self.tracer is not None:
+            self.tracer.dump(self.config['global_settings']['trace_path'])
         
         # Удаляем горячую клавишу
         try:
+            import keyboard
             keyboard.remove_hotkey('f8')
         except:
             pass
@@ -146,11 +777,19 @@ class MultiDetectorSystem:
         # Сохраняем позиции всех оверлеев
         for detector in self.detectors:
             detector.save_overlay_position()
+            detector.detach_capture_engine()
         
         # Закрываем оверлеи
         for detector in self.detectors:
             if detector.overlay:
                 detector.overlay.destroy()
+        
+        if self.root:
+            try:
+                self.root.destroy()
+            except:
+                pass
+            self.root = None
 
 
 def main():
@@ -185,4 +824,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Собранный exe: процесс детекции выполняет свою задачу и не запускает приложение заново
+    multiprocessing.freeze_support()
     main()
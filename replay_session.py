@@ -0,0 +1,89 @@
+"""
+Воспроизведение записанной сессии через детектор (подбор порогов и замер скорости)
+
+Пример:
+    python replay_session.py recordings/session --min-percent 0.01 --realtime
+"""
+
+import argparse
+import json
+from capture.frame_recorder import FrameReplayer
+from detectors.universal_detector import UniversalDetector
+from detectors.soft_pink_detector import SoftPinkDetector
+from detectors.color_space_detector import ColorSpaceLutDetector
+from detectors.color_distance_detector import ColorDistanceDetector
+from detectors.strip_edge_detector import StripEdgeDetector
+
+
+DETECTORS = {
+    "universal": UniversalDetector,
+    "soft_pink": SoftPinkDetector,
+    "color_space": ColorSpaceLutDetector,
+    "distance": ColorDistanceDetector,
+    "strip_edge": StripEdgeDetector,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Прогон записи кадров через детектор")
+    parser.add_argument("path", help="Префикс файлов записи (без расширения)")
+    parser.add_argument("--detector", choices=sorted(DETECTORS), default="universal")
+    parser.add_argument("--config", default="detector_config.json",
+                        help="Конфиг детектора (min_rgb, max_rgb, min_percent)")
+    parser.add_argument("--min-rgb", type=int, nargs=3, metavar=("R", "G", "B"))
+    parser.add_argument("--max-rgb", type=int, nargs=3, metavar=("R", "G", "B"))
+    parser.add_argument("--min-percent", type=float)
+    parser.add_argument("--sample-stride", type=int,
+                        help="Шаг сетки грубой проверки (1 — без неё); сравнивается с полным проходом")
+    parser.add_argument("--sample-margin", type=float)
+    parser.add_argument("--realtime", action="store_true",
+                        help="Соблюдать исходные интервалы между кадрами")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        detector_config = json.load(f)
+    if args.min_rgb:
+        detector_config["min_rgb"] = args.min_rgb
+    if args.max_rgb:
+        detector_config["max_rgb"] = args.max_rgb
+    if args.min_percent is not None:
+        detector_config["min_percent"] = args.min_percent
+    if args.sample_stride is not None:
+        detector_config["sample_stride"] = args.sample_stride
+    if args.sample_margin is not None:
+        detector_config["sample_margin"] = args.sample_margin
+
+    detector = DETECTORS[args.detector](detector_config)
+    replayer = FrameReplayer(args.path)
+
+    print("=" * 60)
+    print(f"Запись: {args.path} ({len(replayer)} кадров {replayer.shape})")
+    print(f"Детектор: {detector.get_name()}, min_percent={detector.min_percent}")
+    print("=" * 60)
+
+    sampler = getattr(detector, "sampler", None)
+    stats = replayer.replay(detector, realtime=args.realtime, collect=sampler is not None)
+
+    print(f"Кадров: {stats['frames']}")
+    print(f"Детекций: {stats['detections']} ({stats['detection_rate'] * 100:.1f}%)")
+    print(f"Время прогона: {stats['elapsed']:.3f} секунд ({stats['fps']:.0f} FPS)")
+    print(f"Детекция: {stats['detect_ns_per_frame']:.0f} нс/кадр")
+
+    if sampler is not None:
+        # Точность грубой проверки: сравнение с тем же детектором без сетки
+        full_detector = DETECTORS[args.detector](dict(detector_config, sample_stride=1))
+        full = replayer.replay(full_detector, collect=True)
+        mismatches = sum(a != b for a, b in zip(stats["results"], full["results"]))
+        sampling = sampler.get_stats()
+        print(f"Грубая проверка (шаг {sampler.stride}): решено по сетке {sampling['coarse_rate'] * 100:.1f}% кадров, "
+              f"полных проходов {sampling['full_passes']}")
+        print(f"Расхождений с полным проходом: {mismatches} ({mismatches / max(1, stats['frames']) * 100:.2f}%), "
+              f"полный проход: {full['detect_ns_per_frame']:.0f} нс/кадр")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,22 @@
 import tkinter as tk
 import json
 import os
+from utils.published_region import PublishedRegion
+from ui.state_channel import DetectorUIState, UIStatePoller
 
 
 class DraggableOverlay:
     """Перемещаемый overlay с рамкой для захвата области экрана"""
     
-    def __init__(self, width, height, border_width=6, outline=False):
+    def __init__(self, width, height, border_width=6, outline=False, ui_rate_hz=30, master=None):
+        """
+        Args:
+            width, height: Размер области захвата
+            border_width: Толщина рамки
+            ui_rate_hz: Частота применения состояния от потока захвата
+            master: Общий корень Tk — окно создаётся как Toplevel в его
+                интерпретаторе (None — собственный tk.Tk)
+        """
         self.width = width
         self.height = height
         self.border_width = border_width
@@ -25,8 +35,8 @@ class DraggableOverlay:
             self.right_panel_width = 90
             self.color_square_size = 35
         
-        # Создаём главное окно
-        self.root = tk.Tk()
+        # Создаём главное окно (или дочернее окно общего корня)
+        self.root = tk.Toplevel(master) if master is not None else tk.Tk()
         self.root.overrideredirect(True)
         self.root.attributes('-topmost', True)
         self.root.attributes('-transparentcolor', 'black')
@@ -36,10 +46,15 @@ class DraggableOverlay:
         self.total_height = max(canvas_height, 200)  # Уменьшена высота
         self.total_width = self.width + 2 * self.border_width + self.right_panel_width
         
+        # Регион захвата для потоков захвата (пишет только UI-поток)
+        self.region_channel = PublishedRegion()
+        
         # Загружаем сохранённую позицию или центрируем
         x, y = self._load_position()
         self.root.geometry(f'{self.total_width}x{self.total_height}+{x}+{y}')
         self.root.configure(bg='black')
+        self._publish_region(x, y)
+        self.root.bind('<Configure>', self._on_configure)
         
         self._create_layout()
         
@@ -49,6 +64,18 @@ class DraggableOverlay:
         self.capture_ref = None
         
         self._draw_border()
+        
+        # Состояние от потока захвата применяется с фиксированной частотой
+        self.ui_state = DetectorUIState()
+        self.ui_poller = UIStatePoller(self.root, rate_hz=ui_rate_hz)
+        self.ui_poller.add(
+            self.ui_state,
+            on_pressed=self.update_key_pressed_indicator,
+            on_center_rgb=lambda rgb: self.update_border_color('', pixel_rgb=rgb),
+            on_fps=self.update_fps,
+            on_active=self.active_var.set
+        )
+        self.ui_poller.start()
     
     def _get_center_position(self):
         screen_width = self.root.winfo_screenwidth()
@@ -175,9 +202,17 @@ class DraggableOverlay:
         chk_window = self.canvas_right.create_window(center_x, y, window=chk, anchor='n')
         y += 30
         
-        # 4. ИНДИКАТОР НАЖАТИЯ КЛАВИШИ (галочка)
+        # 4. ИНДИКАТОР НАЖАТИЯ КЛАВИШИ (галочка, создаётся один раз и только скрывается)
         self.key_pressed_y = y
-        self.key_pressed_id = None
+        self.key_pressed_id = self.canvas_right.create_text(
+            center_x,
+            y,
+            text="✔",
+            fill='lime',
+            font=("Arial", 24, "bold"),
+            anchor='n',
+            state='hidden'
+        )
         y += 35
         
         # 5. ПОЛЕ ВВОДА КЛАВИШИ
@@ -234,17 +269,29 @@ class DraggableOverlay:
         y = max(min_y, min(y, max_y))
         
         self.root.geometry(f'+{x}+{y}')
+        self._publish_region(x, y)
         # Не сохраняем автоматически при перемещении в multi-режиме
         # Сохранение будет через MultiDetectorCapture
     
-    def get_position(self):
-        win_x = self.root.winfo_x()
-        win_y = self.root.winfo_y()
+    def move_to(self, x, y):
+        """Переместить окно (из UI-потока) и опубликовать новый регион"""
+        self.root.geometry(f'+{x}+{y}')
+        self._publish_region(x, y)
+    
+    def _on_configure(self, event):
+        """Окно перемещено (в т.ч. не нами) — публикуем фактическую позицию"""
+        if event.widget is self.root:
+            self._publish_region(self.root.winfo_x(), self.root.winfo_y())
+    
+    def _publish_region(self, win_x, win_y):
+        """Вычислить область захвата по позиции окна и опубликовать её"""
         x1 = win_x + self.border_width
         y1 = win_y + self.border_width
-        x2 = x1 + self.width
-        y2 = y1 + self.height
-        return (x1, y1, x2, y2)
+        self.region_channel.publish((x1, y1, x1 + self.width, y1 + self.height))
+    
+    def get_position(self):
+        """Область захвата (x1, y1, x2, y2) — без обращения к Tk, безопасно из любого потока"""
+        return self.region_channel.region
     
     def update_border_color(self, hex_color, pixel_rgb=None):
         if pixel_rgb and hasattr(self, 'color_square_id'):
@@ -270,6 +317,7 @@ class DraggableOverlay:
     def destroy(self):
         # Сохраняем позицию перед закрытием
         self._save_position()
+        self.ui_poller.stop()
         try:
             self.root.quit()
             self.root.destroy()
@@ -278,17 +326,4 @@ class DraggableOverlay:
     
     def update_key_pressed_indicator(self, is_pressed):
         """Обновить индикатор нажатия клавиши"""
-        if self.key_pressed_id:
-            self.canvas_right.delete(self.key_pressed_id)
-        
-        if is_pressed:
-            self.key_pressed_id = self.canvas_right.create_text(
-                self.right_panel_width // 2,
-                self.key_pressed_y,
-                text="✔",
-                fill='lime',
-                font=("Arial", 24, "bold"),
-                anchor='n'
-            )
-        else:
-            self.key_pressed_id = None
+        self.canvas_right.itemconfig(self.key_pressed_id, state='normal' if is_pressed else 'hidden')
@@ -0,0 +1,107 @@
+"""
+Канал состояния UI: потоки захвата пишут последнее значение, Tk опрашивает с фиксированной частотой
+"""
+
+import time
+
+from utils.trace_recorder import get_tracer
+
+
+class DetectorUIState:
+    """
+    Последнее состояние детектора для отображения
+
+    Потоки захвата только присваивают атрибуты (атомарно, без блокировок
+    и без обращения к Tk). Промежуточные значения между опросами UI
+    просто перезаписываются, поэтому нагрузка на Tk не зависит от того,
+    как часто меняется детекция.
+    """
+
+    __slots__ = ("pressed", "center_rgb", "fps", "active", "pressed_ns", "ui_latency")
+
+    def __init__(self, active=True):
+        self.pressed = False
+        self.center_rgb = None
+        self.fps = 0.0
+        self.active = active
+        # Момент смены pressed (perf_counter_ns) и гистограмма «смена -> отрисовка»
+        self.pressed_ns = 0
+        self.ui_latency = None
+
+    def set_pressed(self, pressed, origin_ns=None):
+        """
+        Установить индикатор нажатия
+
+        Args:
+            origin_ns: Момент, от которого считать задержку до отрисовки
+                (по умолчанию — текущий)
+        """
+        self.pressed_ns = origin_ns if origin_ns is not None else time.perf_counter_ns()
+        self.pressed = pressed
+
+
+class UIStatePoller:
+    """Периодическое применение изменений DetectorUIState в потоке Tk"""
+
+    FIELDS = ("pressed", "center_rgb", "fps", "active")
+
+    def __init__(self, root, rate_hz=30):
+        """
+        Args:
+            root: Окно Tk, в цикле которого выполняется опрос
+            rate_hz: Частота опроса (обновлений UI в секунду)
+        """
+        self.root = root
+        self.interval_ms = max(1, int(1000 / rate_hz))
+        self._entries = []
+        self._after_id = None
+        self.tracer = get_tracer()
+        if self.tracer is not None:
+            self._tr_poll = self.tracer.name_id("ui_apply")
+
+    def add(self, state, on_pressed=None, on_center_rgb=None, on_fps=None, on_active=None):
+        """
+        Подписать обработчики на поля состояния
+
+        Обработчики вызываются в потоке Tk и только при изменении значения.
+        """
+        handlers = {
+            "pressed": on_pressed,
+            "center_rgb": on_center_rgb,
+            "fps": on_fps,
+            "active": on_active,
+        }
+        # Последние применённые значения; уникальная заглушка гарантирует первое применение
+        applied = {field: object() for field in self.FIELDS}
+        self._entries.append((state, handlers, applied))
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._poll)
+
+    def stop(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _poll(self):
+        start = time.perf_counter_ns()
+        changed = False
+        for state, handlers, applied in self._entries:
+            for field in self.FIELDS:
+                handler = handlers[field]
+                if handler is None:
+                    continue
+                value = getattr(state, field)
+                if value != applied[field]:
+                    applied[field] = value
+                    changed = True
+                    handler(value)
+                    if field == "pressed" and state.ui_latency is not None and state.pressed_ns:
+                        state.ui_latency.record(time.perf_counter_ns() - state.pressed_ns)
+        if changed and self.tracer is not None:
+            self.tracer.add(self._tr_poll, start)
+        self._after_id = self.root.after(self.interval_ms, self._poll)
@@ -0,0 +1,179 @@
+"""
+Предсказание момента пересечения строки срабатывания по движению переднего края
+
+Позиции края с временами захвата кадров аппроксимируются прямой (МНК по
+последним кадрам); по скорости считается момент, когда край дойдёт до
+строки срабатывания. Нажатие планируется на этот момент, а не на кадр,
+в котором пересечение уже видно, — так компенсируется задержка захвата
+и обработки.
+"""
+
+from collections import deque
+
+from utils.latency_histogram import LatencyHistogram
+
+
+class EdgeMotionTracker:
+    """История позиций переднего края одного объекта"""
+
+    BACKTRACK_ROWS = 2  # Откат края назад больше чем на столько строк — уже другой объект
+
+    def __init__(self, direction="down", history=4, max_gap=0.2, min_speed=20.0):
+        """
+        Args:
+            direction: "down" — край растёт по строкам, "up" — убывает
+            history: Сколько последних кадров учитывать при оценке скорости
+            max_gap: Разрыв между кадрами (с), после которого история сбрасывается
+            min_speed: Минимальная скорость к строке срабатывания (строк/с) для прогноза
+        """
+        self.sign = 1.0 if direction == "down" else -1.0
+        self.samples = deque(maxlen=max(2, int(history)))
+        self.max_gap = max_gap
+        self.min_speed = min_speed
+        self.velocity = None  # Строк/с (со знаком), None — мало данных
+
+    def reset(self):
+        self.samples.clear()
+        self.velocity = None
+
+    def update(self, t, edge):
+        """
+        Добавить позицию края
+
+        Args:
+            t: Время захвата кадра (perf_counter)
+            edge: Позиция края (строки) или None — объекта нет
+        """
+        if edge is None:
+            self.reset()
+            return
+        samples = self.samples
+        if samples:
+            t_last, e_last = samples[-1]
+            if t <= t_last:
+                return
+            if t - t_last > self.max_gap or (edge - e_last) * self.sign < -self.BACKTRACK_ROWS:
+                samples.clear()
+        samples.append((t, edge))
+        self.velocity = self._fit() if len(samples) >= 2 else None
+
+    def _fit(self):
+        """Наклон прямой edge(t) по МНК"""
+        samples = self.samples
+        n = len(samples)
+        mean_t = sum(t for t, _ in samples) / n
+        mean_e = sum(e for _, e in samples) / n
+        var_t = 0.0
+        cov = 0.0
+        for t, e in samples:
+            dt = t - mean_t
+            var_t += dt * dt
+            cov += dt * (e - mean_e)
+        if var_t <= 0:
+            return None
+        return cov / var_t
+
+    def position_at(self, t):
+        """Позиция края по аппроксимации в момент t (или последняя известная)"""
+        samples = self.samples
+        if not samples:
+            return None
+        if self.velocity is None:
+            return samples[-1][1]
+        n = len(samples)
+        mean_t = sum(s[0] for s in samples) / n
+        mean_e = sum(s[1] for s in samples) / n
+        return mean_e + self.velocity * (t - mean_t)
+
+    def approaching(self):
+        """Объект есть и движется к строке срабатывания не медленнее min_speed"""
+        return self.velocity is not None and self.velocity * self.sign >= self.min_speed
+
+    def predict_crossing(self, target):
+        """
+        Прогноз момента, когда край дойдёт до target
+
+        Returns:
+            float: Время (perf_counter) или None — объект не движется к строке
+        """
+        if not self.approaching():
+            return None
+        velocity = self.velocity
+        t_last = self.samples[-1][0]
+        remaining = target - self.position_at(t_last)
+        if remaining * self.sign <= 0:
+            return t_last
+        return t_last + remaining / velocity
+
+    def interpolate_crossing(self, t, edge, target):
+        """
+        Момент пересечения target между последним кадром истории и кадром (t, edge)
+
+        Вызывается до update() с кадром, на котором пересечение уже видно.
+
+        Returns:
+            float: Оценка времени пересечения или None — нет предыдущего кадра до строки
+        """
+        if not self.samples:
+            return None
+        t_last, e_last = self.samples[-1]
+        if t <= t_last or t - t_last > self.max_gap:
+            return None
+        if (target - e_last) * self.sign <= 0 or edge == e_last:
+            return None
+        fraction = min(1.0, (target - e_last) / (edge - e_last))
+        return t_last + fraction * (t - t_last)
+
+
+class TimingErrorStats:
+    """
+    Ошибка момента нажатия относительно оценки момента пересечения
+
+    Ошибка со знаком: отрицательная — нажали раньше пересечения,
+    положительная — позже. Ранние и поздние нажатия ведутся в отдельных
+    гистограммах (гистограмма хранит только неотрицательные значения).
+    """
+
+    def __init__(self, title):
+        self.title = title
+        self.early = LatencyHistogram("раньше пересечения")
+        self.late = LatencyHistogram("позже пересечения")
+        self.total_ns = 0
+        self.total_abs_ns = 0
+
+    @property
+    def count(self):
+        return self.early.count + self.late.count
+
+    def record(self, error_ns):
+        """Добавить ошибку (нс, со знаком)"""
+        if error_ns < 0:
+            self.early.record(-error_ns)
+        else:
+            self.late.record(error_ns)
+        self.total_ns += error_ns
+        self.total_abs_ns += abs(error_ns)
+
+    def summary(self):
+        """
+        Returns:
+            dict: count, early, late, bias_us (средняя ошибка со знаком), mean_abs_us
+        """
+        count = self.count
+        return {
+            "count": count,
+            "early": self.early.count,
+            "late": self.late.count,
+            "bias_us": self.total_ns / count / 1000 if count else 0.0,
+            "mean_abs_us": self.total_abs_ns / count / 1000 if count else 0.0,
+        }
+
+    def format(self):
+        """Отчёт для вывода в консоль"""
+        s = self.summary()
+        lines = [f"[{self.title}] ошибка момента нажатия: n={s['count']}, "
+                 f"среднее {s['bias_us']:+.0f} мкс, средний модуль {s['mean_abs_us']:.0f} мкс"]
+        for histogram in (self.early, self.late):
+            if histogram.count:
+                lines.append("  " + histogram.format())
+        return "\n".join(lines)
@@ -0,0 +1,59 @@
+"""
+Проверка, изменился ли кадр с прошлого раза (чтобы не запускать детектор повторно)
+"""
+
+import numpy as np
+
+
+class FrameChangeGate:
+    """
+    Дешёвое сравнение кадра с предыдущим
+
+    Небольшие кадры сравниваются целиком, крупные — по разреженной сетке
+    пикселей с шагом sample_stride. Все буферы выделяются заранее и
+    пересоздаются только при смене размера кадра.
+    """
+
+    def __init__(self, sample_stride=4, full_compare_pixels=16384):
+        """
+        Args:
+            sample_stride: Шаг сетки для крупных кадров (по строкам и столбцам)
+            full_compare_pixels: Кадры не больше этого размера сравниваются целиком
+        """
+        self.sample_stride = max(1, int(sample_stride))
+        self.full_compare_pixels = full_compare_pixels
+        self._shape = None
+        self._stride = 1
+        self._previous = None
+        self._diff = None
+
+    def _sample(self, frame):
+        stride = self._stride
+        return frame if stride == 1 else frame[::stride, ::stride]
+
+    def reset(self):
+        """Сбросить сохранённый кадр (следующий кадр считается новым)"""
+        self._shape = None
+
+    def is_duplicate(self, frame):
+        """
+        Проверить кадр и запомнить его для следующего сравнения
+
+        Returns:
+            bool: True, если кадр совпадает с предыдущим
+        """
+        if frame.shape != self._shape:
+            self._shape = frame.shape
+            pixels = frame.shape[0] * frame.shape[1]
+            self._stride = 1 if pixels <= self.full_compare_pixels else self.sample_stride
+            sample = self._sample(frame)
+            self._previous = np.array(sample)
+            self._diff = np.empty(sample.shape, dtype=bool)
+            return False
+
+        sample = self._sample(frame)
+        np.not_equal(sample, self._previous, out=self._diff)
+        if not self._diff.any():
+            return True
+        np.copyto(self._previous, sample)
+        return False
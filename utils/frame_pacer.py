@@ -0,0 +1,80 @@
+"""
+Гибридный планировщик кадров: сон до подхода к дедлайну, затем короткое ожидание в цикле
+"""
+
+import time
+
+
+class FramePacer:
+    """
+    Выдерживание темпа target_fps без загрузки ядра на 100%
+
+    time.sleep засыпает грубо (на Windows — с точностью ~1 мс) и часто
+    просыпается позже дедлайна, поэтому поток спит только до момента
+    «дедлайн минус spin_us», а оставшийся отрезок дожидается по
+    perf_counter_ns в цикле.
+    """
+
+    def __init__(self, target_fps, spin_us=1000):
+        """
+        Args:
+            target_fps: Целевая частота кадров
+            spin_us: Длина финального активного ожидания (мкс)
+        """
+        self.interval_ns = int(1e9 / target_fps)
+        self.spin_ns = int(spin_us * 1000)
+        self._deadline = None
+
+        # Статистика
+        self.waits = 0
+        self.missed = 0  # Кадр обработан позже дедлайна
+        self.total_late_ns = 0  # Суммарное опоздание пробуждения
+        self.max_late_ns = 0
+
+    def set_fps(self, target_fps):
+        """Изменить целевую частоту кадров"""
+        self.interval_ns = int(1e9 / target_fps)
+
+    def reset(self):
+        """Начать отсчёт заново (например, после паузы)"""
+        self._deadline = None
+
+    def wait(self):
+        """Дождаться начала следующего кадра"""
+        perf_counter_ns = time.perf_counter_ns
+        now = perf_counter_ns()
+        if self._deadline is None:
+            self._deadline = now + self.interval_ns
+            return
+
+        deadline = self._deadline
+        remaining = deadline - now
+        if remaining <= 0:
+            # Отстали — продолжаем от текущего момента, без серии кадров вдогонку
+            self.missed += 1
+            self._deadline = now + self.interval_ns
+            return
+
+        if remaining > self.spin_ns:
+            time.sleep((remaining - self.spin_ns) / 1e9)
+        while perf_counter_ns() < deadline:
+            pass
+
+        late = perf_counter_ns() - deadline
+        self.waits += 1
+        self.total_late_ns += late
+        if late > self.max_late_ns:
+            self.max_late_ns = late
+        self._deadline = deadline + self.interval_ns
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: waits, missed, avg_late_us, max_late_us
+        """
+        return {
+            "waits": self.waits,
+            "missed": self.missed,
+            "avg_late_us": self.total_late_ns / self.waits / 1000 if self.waits else 0.0,
+            "max_late_us": self.max_late_ns / 1000,
+        }
@@ -1,80 +1,272 @@
 """
 Модуль для управления глобальным состоянием между экземплярами
+
+Внутри процесса состояние — общий флаг, наблюдатели вызываются синхронно
+в момент переключения. Между процессами состояние лежит в небольшом блоке
+общей памяти, а остальные процессы будятся датаграммой на localhost:
+ни опроса файла, ни периодических проверок.
 """
 
-import json
+import atexit
 import os
+import socket
+import tempfile
 import threading
-import time
+from contextlib import contextmanager
+import numpy as np
+from multiprocessing import shared_memory
+
+
+SHM_NAME = "pyt_global_state"
+MAX_PEERS = 16
+
+# Раскладка блока общей памяти (int64): активность, версия, UDP-порты процессов
+_ACTIVE = 0
+_VERSION = 1
+_PEERS = 2
+
+
+_channel_lock = threading.Lock()
+_channel = None
+
+
+@contextmanager
+def _registry_lock():
+    """
+    Межпроцессная блокировка блока состояния (lock-файл во временном каталоге)
+
+    Создание блока, захват места в таблице портов и освобождение места
+    выполняются под ней, иначе два одновременно стартующих процесса могут
+    занять один слот.
+    """
+    path = os.path.join(tempfile.gettempdir(), SHM_NAME + ".lock")
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK сдаётся через ~10 секунд ожидания — ждём дальше
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _get_channel():
+    """Общий для процесса канал состояния"""
+    global _channel
+    with _channel_lock:
+        if _channel is None:
+            _channel = _StateChannel()
+        return _channel
+
+
+class _StateChannel:
+    """Флаг активности процесса и его синхронизация с другими процессами"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = True
+        self.observers = []
+
+        self._shm = None
+        self._shared = None
+        self._socket = None
+        self._sender = None
+        self._port = 0
+        self._listener = None
+        self._closing = False
+        self._open_shared()
+
+    def _open_shared(self):
+        """Подключиться к общей памяти и зарегистрировать UDP-порт процесса"""
+        size = (_PEERS + MAX_PEERS) * 8
+        try:
+            with _registry_lock():
+                self._attach_shared(size)
+            atexit.register(self.close)
+        except Exception as e:
+            print(f"[GlobalState] Синхронизация между процессами недоступна: {e}")
+            self._shared = None
+
+    def _attach_shared(self, size):
+        """Создать или открыть блок и занять слот (под _registry_lock)"""
+        try:
+            self._shm = shared_memory.SharedMemory(name=SHM_NAME, create=True, size=size)
+            created = True
+        except FileExistsError:
+            try:
+                # Python 3.13+: не отдавать чужой блок resource_tracker этого процесса
+                self._shm = shared_memory.SharedMemory(name=SHM_NAME, track=False)
+            except TypeError:
+                self._shm = shared_memory.SharedMemory(name=SHM_NAME)
+            created = False
+        self._shared = np.ndarray((_PEERS + MAX_PEERS,), dtype=np.int64, buffer=self._shm.buf)
+        if created:
+            self._shared[:] = 0
+            self._shared[_ACTIVE] = 1
+        self.active = bool(self._shared[_ACTIVE])
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(("127.0.0.1", 0))
+        self._port = self._socket.getsockname()[1]
+        self._sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        peers = self._shared[_PEERS:]
+        free = np.flatnonzero(peers == 0)
+        if len(free) == 0:
+            print("[GlobalState] Нет свободного места для процесса, уведомления от других процессов недоступны")
+        else:
+            peers[free[0]] = self._port
+
+    def close(self):
+        """
+        Остановить приём уведомлений и освободить место процесса в таблице портов
+
+        Последний процесс удаляет блок общей памяти.
+        """
+        if self._closing:
+            return
+        self._closing = True
+        if self._listener is not None:
+            # Будим поток датаграммой самому себе (закрытие сокета recvfrom не прерывает)
+            try:
+                self._sender.sendto(b"\x00", ("127.0.0.1", self._port))
+            except OSError:
+                pass
+            self._listener.join(timeout=1.0)
+            self._listener = None
+        for sock in (self._socket, self._sender):
+            if sock is not None:
+                sock.close()
+        self._socket = None
+        self._sender = None
+
+        if self._shared is None:
+            return
+        try:
+            with _registry_lock():
+                peers = self._shared[_PEERS:]
+                peers[peers == self._port] = 0
+                if not peers.any():
+                    try:
+                        self._shm.unlink()
+                    except FileNotFoundError:
+                        pass
+        except OSError as e:
+            print(f"[GlobalState] Ошибка освобождения общей памяти: {e}")
+
+    def start(self):
+        """Запустить поток приёма уведомлений от других процессов"""
+        if self._socket is None or self._listener is not None or self._closing:
+            return
+        self._listener = threading.Thread(target=self._listen_loop, daemon=True)
+        self._listener.start()
+
+    def _listen_loop(self):
+        while not self._closing:
+            try:
+                self._socket.recvfrom(16)
+            except ConnectionResetError:
+                # На Windows так приходят ошибки ICMP от закрытых портов — не фатально
+                continue
+            except OSError as e:
+                if not self._closing:
+                    print(f"[GlobalState] Приём уведомлений остановлен: {e}")
+                break
+            if self._closing:
+                break
+            self._apply(bool(self._shared[_ACTIVE]), publish=False)
+
+    def set_active(self, active):
+        self._apply(bool(active), publish=True)
+
+    def _apply(self, active, publish):
+        """Установить флаг и синхронно уведомить наблюдателей процесса"""
+        with self._lock:
+            if active == self.active:
+                return
+            self.active = active
+            observers = list(self.observers)
+            if publish and self._shared is not None:
+                self._shared[_ACTIVE] = int(active)
+                self._shared[_VERSION] += 1
+
+        for callback in observers:
+            try:
+                callback(active)
+            except:
+                pass
+
+        if publish:
+            self._notify_peers()
+
+    def _notify_peers(self):
+        """Разбудить остальные процессы"""
+        if self._shared is None or self._sender is None:
+            return
+        for port in self._shared[_PEERS:]:
+            if port == 0 or port == self._port:
+                continue
+            try:
+                self._sender.sendto(b"\x01", ("127.0.0.1", int(port)))
+            except OSError:
+                pass
 
 
 class GlobalState:
     """Класс для синхронизации состояния между экземплярами программы"""
-    
-    STATE_FILE = "global_state.json"
-    
+
     def __init__(self):
+        self._channel = _get_channel()
         self.observers = []
         self.monitoring = False
-        self.monitor_thread = None
-        self._last_state = None
-    
+
     def get_active(self):
         """Получить текущее состояние активности"""
-        try:
-            if os.path.exists(self.STATE_FILE):
-                with open(self.STATE_FILE, "r") as f:
-                    data = json.load(f)
-                return data.get("active", True)
-        except:
-            pass
-        return True
-    
+        return self._channel.active
+
     def set_active(self, active):
-        """Установить состояние активности"""
-        try:
-            with open(self.STATE_FILE, "w") as f:
-                json.dump({"active": active}, f)
-        except:
-            pass
-    
+        """Установить состояние активности (наблюдатели вызываются сразу)"""
+        self._channel.set_active(active)
+
     def toggle_active(self):
         """Переключить состояние активности"""
-        current = self.get_active()
-        new_state = not current
+        new_state = not self.get_active()
         self.set_active(new_state)
         return new_state
-    
+
     def add_observer(self, callback):
         """Добавить наблюдателя за изменениями состояния"""
         self.observers.append(callback)
-    
+        with self._channel._lock:
+            self._channel.observers.append(callback)
+
     def start_monitoring(self):
-        """Запустить мониторинг изменений файла состояния"""
+        """Начать получать изменения состояния из других процессов"""
         if self.monitoring:
             return
-        
         self.monitoring = True
-        self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self.monitor_thread.start()
-    
+        self._channel.start()
+
     def stop_monitoring(self):
-        """Остановить мониторинг"""
+        """Отписать наблюдателей этого экземпляра"""
         self.monitoring = False
-    
-    def _monitor_loop(self):
-        """Цикл мониторинга (ОПТИМИЗИРОВАНО)"""
-        while self.monitoring:
-            try:
-                current_state = self.get_active()
-                if current_state != self._last_state:
-                    self._last_state = current_state
-                    # Уведомляем наблюдателей
-                    for callback in self.observers:
-                        try:
-                            callback(current_state)
-                        except:
-                            pass
-            except:
-                pass  # Игнорируем ошибки чтения файла
-            time.sleep(1.5)  # Проверяем раз в 1.5 сек (меньше нагрузка)
+        with self._channel._lock:
+            for callback in self.observers:
+                if callback in self._channel.observers:
+                    self._channel.observers.remove(callback)
+        self.observers = []
@@ -0,0 +1,320 @@
+"""
+Асинхронная отправка нажатий клавиш из отдельного потока
+
+Поток захвата только кладёт событие (timestamp, key, action) в очередь
+и сразу продолжает работу; задержки ОС при эмуляции ввода его не тормозят.
+Нажатие можно запланировать на заданный момент (schedule_press) — поток
+спит до подхода к нему и дожидается последний отрезок в цикле. План и
+нажатие можно пометить токеном (new_token) и узнать по нему, когда
+клавиша была нажата на самом деле (plan_result).
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+
+from utils.latency_histogram import LatencyHistogram
+from utils.metrics_server import histogram_metrics
+from utils.trace_recorder import get_tracer
+
+
+# Общий диспетчер для всех экземпляров захвата
+_dispatcher_lock = threading.Lock()
+_dispatcher = None
+
+
+def get_key_dispatcher():
+    """Получить (и при необходимости запустить) общий диспетчер клавиш"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = KeyDispatcher()
+            _dispatcher.start()
+        return _dispatcher
+
+
+class KeyDispatcher:
+    """Поток эмуляции клавиш с ограниченной очередью событий"""
+
+    PRESS = True
+    RELEASE = False
+    YIELD_NS = 200_000  # До плана дальше этого при ожидании отпускается GIL (sleep(0) стоит десятки мкс)
+
+    def __init__(self, press=None, release=None, max_queue=256, spin_us=2000):
+        """
+        Args:
+            press: Функция нажатия клавиши (по умолчанию keyboard.press)
+            release: Функция отпускания клавиши (по умолчанию keyboard.release)
+            max_queue: Размер очереди (сверх него отбрасываются только повторные события клавиши)
+            spin_us: Длина активного ожидания перед запланированным нажатием (мкс)
+        """
+        if press is None or release is None:
+            import keyboard
+            press = press or keyboard.press
+            release = release or keyboard.release
+        self._press = press
+        self._release = release
+
+        # deque.append/popleft атомарны — производителям не нужна блокировка
+        # Без maxlen: вытеснение старого события могло бы потерять отпускание
+        self._queue = deque()
+        self._max_queue = max_queue
+        self._queued_action = {}  # key -> последнее поставленное в очередь действие
+        self._wakeup = threading.Event()
+        self._key_state = {}  # key -> True, если клавиша сейчас нажата
+        # token -> (key, момент нажатия, origin_ns, latency); запись заменяется целиком при уточнении
+        self._scheduled = {}
+        self._spin_ns = int(spin_us * 1000)
+        self._tokens = itertools.count(1)
+        # token -> perf_counter_ns нажатия (0 — выполнено без нажатия); забирается plan_result
+        self._fired = {}
+        # Выполнение, отмена и уточнение плана не пересекаются
+        self._plan_lock = threading.Lock()
+        self.running = False
+        self._thread = None
+
+        # Статистика
+        self.latency = LatencyHistogram("очередь клавиш -> эмуляция")
+        self.schedule_latency = LatencyHistogram("план нажатия -> эмуляция")
+        self.tracer = get_tracer()
+        if self.tracer is not None:
+            self._tr_inject = self.tracer.name_id("key_inject")
+        self.injected = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.scheduled_fired = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Остановка (оставшиеся события обрабатываются, нажатые клавиши отпускаются)"""
+        if not self.running:
+            return
+        self.running = False
+        self._wakeup.set()
+        self._thread.join(timeout=1.0)
+        with self._plan_lock:
+            for token in self._scheduled:
+                self._fired.setdefault(token, 0)
+            self._scheduled.clear()
+        self._drain()
+        for key, pressed in list(self._key_state.items()):
+            if pressed:
+                self._inject(key, False, time.perf_counter_ns(), None, None)
+
+    def new_token(self):
+        """Новый токен для schedule_press / press"""
+        return next(self._tokens)
+
+    def press(self, key, origin_ns=None, latency=None, token=None):
+        """
+        Поставить нажатие в очередь (не блокирует)
+
+        Args:
+            key: Клавиша
+            origin_ns: Момент, от которого считать полную задержку (perf_counter_ns)
+            latency: LatencyHistogram для задержки origin_ns -> эмуляция
+            token: Токен, по которому plan_result вернёт момент нажатия
+        """
+        self._enqueue(key, True, origin_ns, latency, token)
+
+    def release(self, key, origin_ns=None, latency=None):
+        """Поставить отпускание в очередь (не блокирует)"""
+        self._enqueue(key, False, origin_ns, latency, None)
+
+    def schedule_press(self, key, fire_ns, origin_ns=None, latency=None, token=None):
+        """
+        Запланировать нажатие на момент fire_ns (perf_counter_ns)
+
+        Повторный вызов с тем же токеном заменяет план (уточнение момента);
+        если план уже выполнен, вызов ничего не делает. Момент в прошлом —
+        нажатие при ближайшем пробуждении потока.
+
+        Returns:
+            int: Токен плана
+        """
+        if token is None:
+            token = self.new_token()
+        with self._plan_lock:
+            if token not in self._fired:
+                self._scheduled[token] = (key, fire_ns, origin_ns, latency)
+        self._wakeup.set()
+        return token
+
+    def cancel_scheduled(self, token):
+        """
+        Отменить запланированное нажатие
+
+        Returns:
+            bool: True — план снят до выполнения; False — его уже нет
+                  (выполнен — результат доступен через plan_result)
+        """
+        with self._plan_lock:
+            return self._scheduled.pop(token, None) is not None
+
+    def plan_result(self, token):
+        """
+        Результат плана или нажатия с токеном (забирается один раз)
+
+        Returns:
+            int: perf_counter_ns нажатия; 0 — выполнено без нажатия (клавиша уже
+                 была нажата, ошибка эмуляции); None — ещё не выполнено или отменено
+        """
+        with self._plan_lock:
+            return self._fired.pop(token, None)
+
+    def _set_result(self, token, pressed_ns):
+        """Записать результат токена (реальное нажатие не затирается нулём)"""
+        if token is None:
+            return
+        with self._plan_lock:
+            if pressed_ns:
+                self._fired[token] = pressed_ns
+            else:
+                self._fired.setdefault(token, 0)
+
+    def _enqueue(self, key, action, origin_ns, latency, token):
+        # При переполнении отбрасываем событие, повторяющее последнее поставленное для этой
+        # клавиши (поток всё равно свёл бы его); смена состояния всегда попадает в очередь
+        if len(self._queue) >= self._max_queue and self._queued_action.get(key) == action:
+            self.dropped += 1
+            self._set_result(token, 0)
+            return
+        self._queued_action[key] = action
+        self._queue.append((time.perf_counter_ns(), key, action, origin_ns, latency, token))
+        self._wakeup.set()
+
+    def _dispatch_loop(self):
+        timeout = 0.1
+        while self.running:
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            self._drain()
+            next_ns = self._fire_scheduled()
+            timeout = 0.1
+            if next_ns is not None:
+                # Просыпаемся за spin_us до ближайшего плана, остаток ждём в _fire_scheduled
+                timeout = min(timeout, max(0.0, (next_ns - self._spin_ns - time.perf_counter_ns()) / 1e9))
+
+    def _fire_scheduled(self):
+        """
+        Выполнить наступившие планы нажатий
+
+        Returns:
+            int: Момент ближайшего оставшегося плана (нс) или None
+        """
+        scheduled = self._scheduled
+        if not scheduled:
+            return None
+        perf_counter_ns = time.perf_counter_ns
+        queue = self._queue
+        next_ns = None
+        for token, entry in list(scheduled.items()):
+            key, fire_ns, origin_ns, latency = entry
+            if fire_ns - perf_counter_ns() > self._spin_ns:
+                if next_ns is None or fire_ns < next_ns:
+                    next_ns = fire_ns
+                continue
+            # Активное ожидание плана: события из очереди не ждут его окончания,
+            # а sleep(0) отпускает GIL потокам захвата и детекции
+            while True:
+                remaining = fire_ns - perf_counter_ns()
+                if remaining <= 0:
+                    break
+                if queue:
+                    self._drain()
+                elif remaining > self.YIELD_NS:
+                    time.sleep(0)
+            with self._plan_lock:
+                # План могли отменить или уточнить, пока ждали
+                if scheduled.get(token) is not entry:
+                    continue
+                del scheduled[token]
+                if self._key_state.get(key, False):
+                    self.coalesced += 1
+                    self._fired[token] = 0
+                    continue
+                pressed_ns = self._inject(key, True, fire_ns, origin_ns, latency, self.schedule_latency)
+                self._fired[token] = pressed_ns or 0
+                if pressed_ns:
+                    self.scheduled_fired += 1
+        return next_ns
+
+    def _drain(self):
+        """Обработать все события из очереди"""
+        queue = self._queue
+        key_state = self._key_state
+        while queue:
+            try:
+                enqueued_ns, key, action, origin_ns, latency, token = queue.popleft()
+            except IndexError:
+                break
+            # Нажатие уже нажатой / отпускание отпущенной клавиши — лишнее событие
+            if key_state.get(key, False) == action:
+                self.coalesced += 1
+                self._set_result(token, 0)
+                continue
+            self._set_result(token, self._inject(key, action, enqueued_ns, origin_ns, latency))
+
+    def _inject(self, key, action, enqueued_ns, origin_ns, latency, queue_latency=None):
+        """
+        Эмулировать событие клавиши
+
+        Returns:
+            int: perf_counter_ns после эмуляции или None при ошибке
+        """
+        if self.tracer is not None:
+            start = time.perf_counter_ns()
+        try:
+            if action:
+                self._press(key)
+            else:
+                self._release(key)
+        except Exception as e:
+            print(f"[KeyDispatcher] Ошибка эмуляции клавиши {key}: {e}")
+            return None
+        self._key_state[key] = action
+        self.injected += 1
+        now = time.perf_counter_ns()
+        if self.tracer is not None:
+            self.tracer.add(self._tr_inject, start, now)
+        (queue_latency or self.latency).record(now - enqueued_ns)
+        if latency is not None and origin_ns is not None:
+            latency.record(now - origin_ns)
+        return now
+
+    def collect_metrics(self):
+        """
+        Счётчики диспетчера для сервера метрик
+
+        Returns:
+            list: записи (name, type, help, labels, value)
+        """
+        metrics = [
+            ("pyt_keys_injected_total", "counter", "Эмулированные нажатия/отпускания", {}, self.injected),
+            ("pyt_keys_coalesced_total", "counter", "Отброшенные лишние события клавиш", {}, self.coalesced),
+            ("pyt_keys_dropped_total", "counter", "Отброшенные при переполнении очереди повторные события", {}, self.dropped),
+            ("pyt_key_queue_length", "gauge", "Событий в очереди", {}, len(self._queue)),
+            ("pyt_keys_scheduled_fired_total", "counter", "Выполненные запланированные нажатия", {},
+             self.scheduled_fired),
+        ]
+        metrics.extend(histogram_metrics("pyt_key_dispatch_latency_seconds",
+                                         "Задержка очередь клавиш -> эмуляция", self.latency, {}))
+        metrics.extend(histogram_metrics("pyt_key_schedule_latency_seconds",
+                                         "Опоздание запланированного нажатия", self.schedule_latency, {}))
+        return metrics
+
+    def get_latency_stats(self):
+        """
+        Статистика задержки постановка -> эмуляция
+
+        Returns:
+            dict: count, avg_us, p50_us, p95_us, p99_us, max_us
+        """
+        return self.latency.summary()
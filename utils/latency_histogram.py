@@ -0,0 +1,134 @@
+"""
+Гистограммы задержек с логарифмически-линейными корзинами
+
+Запись значения — несколько целочисленных операций и инкремент в списке,
+поэтому её можно вызывать на горячем пути каждого кадра. Точность
+перцентилей — не хуже 1/SUB_BUCKETS (~6%) от значения.
+"""
+
+import time
+
+
+SUB_BITS = 4
+SUB_BUCKETS = 1 << SUB_BITS
+MAX_SHIFT = 40  # Значения до ~2^45 нс (~10 часов)
+BUCKETS = (MAX_SHIFT + 2) * SUB_BUCKETS
+
+
+def bucket_index(value_ns):
+    """Номер корзины для значения в наносекундах"""
+    if value_ns < 2 * SUB_BUCKETS:
+        return value_ns if value_ns > 0 else 0
+    shift = value_ns.bit_length() - SUB_BITS - 1
+    if shift > MAX_SHIFT:
+        return BUCKETS - 1
+    return shift * SUB_BUCKETS + (value_ns >> shift)
+
+
+def bucket_upper_bound(index):
+    """Верхняя граница корзины (нс)"""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    top = index - shift * SUB_BUCKETS
+    return ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Распределение задержек одного этапа"""
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, value_ns):
+        """Добавить задержку (нс)"""
+        if value_ns < 0:
+            value_ns = 0
+        self.counts[bucket_index(value_ns)] += 1
+        self.count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def record_since(self, start_ns):
+        """Добавить задержку от start_ns (perf_counter_ns) до текущего момента"""
+        self.record(time.perf_counter_ns() - start_ns)
+
+    def reset(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def percentile(self, p):
+        """
+        Перцентиль задержки (нс)
+
+        Args:
+            p: Перцентиль от 0 до 100
+        """
+        count = self.count
+        if not count:
+            return 0
+        rank = max(1, int(count * p / 100 + 0.5))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                return min(bucket_upper_bound(index), self.max_ns)
+        return self.max_ns
+
+    def summary(self):
+        """
+        Returns:
+            dict: count, avg_us, p50_us, p95_us, p99_us, max_us
+        """
+        count = self.count
+        return {
+            "count": count,
+            "avg_us": self.total_ns / count / 1000 if count else 0.0,
+            "p50_us": self.percentile(50) / 1000,
+            "p95_us": self.percentile(95) / 1000,
+            "p99_us": self.percentile(99) / 1000,
+            "max_us": self.max_ns / 1000,
+        }
+
+    def format(self):
+        """Строка отчёта для вывода в консоль"""
+        s = self.summary()
+        return (f"{self.name}: n={s['count']}, p50 {s['p50_us']:.0f} мкс, p95 {s['p95_us']:.0f} мкс, "
+                f"p99 {s['p99_us']:.0f} мкс, макс {s['max_us']:.0f} мкс")
+
+
+class LatencyStats:
+    """Набор гистограмм по этапам конвейера"""
+
+    def __init__(self, title):
+        self.title = title
+        self.stages = {}
+
+    def stage(self, name):
+        """Гистограмма этапа (создаётся при первом обращении)"""
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = LatencyHistogram(name)
+        return histogram
+
+    def summary(self):
+        """
+        Returns:
+            dict: этап -> summary() гистограммы
+        """
+        return {name: histogram.summary() for name, histogram in self.stages.items()}
+
+    def format(self):
+        """Отчёт по всем этапам, в которых есть данные"""
+        lines = [f"[{self.title}] задержки по этапам:"]
+        for histogram in self.stages.values():
+            if histogram.count:
+                lines.append("  " + histogram.format())
+        return "\n".join(lines)
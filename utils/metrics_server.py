@@ -0,0 +1,140 @@
+"""
+Локальный HTTP-эндпоинт с метриками в текстовом формате Prometheus
+
+Сервер работает в своём потоке и при запросе только читает счётчики,
+которые потоки захвата обновляют простым присваиванием; в цикл захвата
+он ничего не добавляет.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_server_lock = threading.Lock()
+_server = None
+
+QUANTILES = (50, 95, 99)
+
+
+def get_metrics_server():
+    """Запущенный сервер метрик или None"""
+    return _server
+
+
+def start_metrics_server(port=9464, host="127.0.0.1"):
+    """Запустить (один раз на процесс) сервер метрик"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = MetricsServer(port, host)
+            _server.start()
+        return _server
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def histogram_metrics(name, help_text, histogram, labels):
+    """
+    Метрики summary по LatencyHistogram (секунды)
+
+    Returns:
+        list: записи (name, type, help, labels, value)
+    """
+    metrics = []
+    for q in QUANTILES:
+        metrics.append((name, "summary", help_text, dict(labels, quantile=f"{q / 100:g}"),
+                        histogram.percentile(q) / 1e9))
+    metrics.append((name + "_sum", "summary", help_text, labels, histogram.total_ns / 1e9))
+    metrics.append((name + "_count", "summary", help_text, labels, histogram.count))
+    metrics.append((name + "_max", "gauge", help_text + " (максимум)", labels, histogram.max_ns / 1e9))
+    return metrics
+
+
+class MetricsServer:
+    """HTTP-сервер /metrics с подключаемыми источниками метрик"""
+
+    def __init__(self, port=9464, host="127.0.0.1"):
+        """
+        Args:
+            port: Порт HTTP
+            host: Адрес (по умолчанию только локальные подключения)
+        """
+        self.port = port
+        self.host = host
+        self._collectors = []
+        self._httpd = None
+        self._thread = None
+
+    def register(self, collector):
+        """
+        Добавить источник метрик
+
+        Args:
+            collector: Функция без аргументов, возвращающая список записей
+                (name, type, help, labels, value)
+        """
+        self._collectors = self._collectors + [collector]
+
+    def unregister(self, collector):
+        self._collectors = [c for c in self._collectors if c is not collector]
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = server.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            print(f"[Metrics] Не удалось открыть порт {self.port}: {e}")
+            return
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"[Metrics] http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def render(self):
+        """Текст всех метрик в формате Prometheus"""
+        families = {}
+        for collector in self._collectors:
+            try:
+                metrics = collector()
+            except Exception as e:
+                print(f"[Metrics] Ошибка источника метрик: {e}")
+                continue
+            for name, kind, help_text, labels, value in metrics:
+                family = name
+                if kind == "summary":
+                    family = name[:-4] if name.endswith("_sum") else name[:-6] if name.endswith("_count") else name
+                entry = families.setdefault(family, (kind, help_text, []))
+                entry[2].append((name, labels, value))
+
+        lines = []
+        for family, (kind, help_text, samples) in families.items():
+            lines.append(f"# HELP {family} {_escape(help_text)}")
+            lines.append(f"# TYPE {family} {kind}")
+            for name, labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
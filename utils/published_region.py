@@ -0,0 +1,38 @@
+"""
+Регион захвата, публикуемый UI-потоком для потоков захвата
+"""
+
+
+class PublishedRegion:
+    """
+    Версионированный регион без блокировок
+
+    Пишет только UI-поток (обработчики перетаскивания / Configure), читают
+    потоки захвата. Состояние хранится одним кортежем (версия, регион),
+    присваивание которого атомарно, поэтому читатель всегда видит
+    согласованную пару и не обращается к Tk.
+    """
+
+    def __init__(self, region=None):
+        self._state = (0, region)
+
+    def publish(self, region):
+        """Опубликовать новый регион (x1, y1, x2, y2); версия растёт только при изменении"""
+        version, current = self._state
+        if region != current:
+            self._state = (version + 1, region)
+
+    def read(self):
+        """
+        Returns:
+            tuple: (версия, регион)
+        """
+        return self._state
+
+    @property
+    def region(self):
+        return self._state[1]
+
+    @property
+    def version(self):
+        return self._state[0]
@@ -0,0 +1,129 @@
+"""
+Кольцо кадров в общей памяти (multiprocessing.shared_memory) для процессов-детекторов
+
+Раскладка блока памяти:
+    int64[0]            — число слотов
+    int64[1]            — размер слота в байтах
+    int64[2:2+slots]    — номер кадра в каждом слоте (-1 — слот пишется)
+    далее               — слоты с пикселями uint8
+
+Процесс захвата пишет кадр (или несколько вырезок подряд) в очередной
+слот, процессы-детекторы читают его через numpy view прямо из общей
+памяти: между процессами передаются только номер кадра, номер слота и
+смещения вырезок.
+"""
+
+import numpy as np
+from multiprocessing import shared_memory
+
+
+HEADER_FIELDS = 2
+
+
+def _open_shared_memory(name):
+    """Подключиться к существующему блоку, не регистрируя его в resource_tracker"""
+    try:
+        # Python 3.13+: иначе трекер дочернего процесса удалит чужой блок при выходе
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    """Кольцевой буфер кадров в общей памяти"""
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self.owner = owner
+        self.name = shm.name
+
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        self.slots = int(header[0])
+        self.slot_bytes = int(header[1])
+        self._seqs = np.ndarray((self.slots,), dtype=np.int64, buffer=shm.buf,
+                                offset=HEADER_FIELDS * 8)
+        self._data_offset = (HEADER_FIELDS + self.slots) * 8
+        self.seq = -1
+
+    @classmethod
+    def create(cls, slots, slot_bytes):
+        """
+        Создать новое кольцо (процесс захвата)
+
+        Args:
+            slots: Количество слотов
+            slot_bytes: Максимальный размер кадра в байтах
+        """
+        size = (HEADER_FIELDS + slots) * 8 + slots * slot_bytes
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray((HEADER_FIELDS + slots,), dtype=np.int64, buffer=shm.buf)
+        header[0] = slots
+        header[1] = slot_bytes
+        header[HEADER_FIELDS:] = -1
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Подключиться к кольцу по имени (процесс-детектор)"""
+        return cls(_open_shared_memory(name), owner=False)
+
+    def slot_for(self, seq):
+        return seq % self.slots
+
+    def view(self, slot, shape, offset=0):
+        """Zero-copy view кадра (H, W, 3) в слоте (offset — смещение в байтах внутри слота)"""
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf,
+                          offset=self._data_offset + slot * self.slot_bytes + offset)
+
+    def slot_seq(self, slot):
+        """Номер кадра, который сейчас лежит в слоте"""
+        return int(self._seqs[slot])
+
+    def write(self, frame):
+        """
+        Записать кадр в следующий слот
+
+        Returns:
+            tuple: (seq, slot)
+        """
+        seq, slot, _ = self.write_parts([frame])
+        return seq, slot
+
+    def write_parts(self, parts):
+        """
+        Записать несколько кадров (вырезок) подряд в следующий слот
+
+        Returns:
+            tuple: (seq, slot, offsets — смещение каждой части в слоте)
+        """
+        offsets = []
+        total = 0
+        for part in parts:
+            offsets.append(total)
+            total += part.nbytes
+        if total > self.slot_bytes:
+            raise ValueError(f"Кадр ({total} байт) не помещается в слот ({self.slot_bytes} байт)")
+        seq = self.seq + 1
+        slot = self.slot_for(seq)
+        # Читатель, заставший -1 или другой номер, отбросит результат
+        self._seqs[slot] = -1
+        for part, offset in zip(parts, offsets):
+            np.copyto(self.view(slot, part.shape, offset), part)
+        self._seqs[slot] = seq
+        self.seq = seq
+        return seq, slot, offsets
+
+    def close(self):
+        """Отключиться от блока (владелец также удаляет его)"""
+        # Все view на буфер должны быть освобождены до закрытия
+        self._seqs = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,123 @@
+"""
+Запись интервалов (span) конвейера в заранее выделенный буфер и выгрузка в Chrome trace-event JSON
+
+Файл открывается в Perfetto (ui.perfetto.dev) или chrome://tracing.
+Трассировка включается явно (enable_tracing); пока она выключена,
+get_tracer() возвращает None и код захвата проверяет только это значение.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+import numpy as np
+
+
+_tracer = None
+
+
+def get_tracer():
+    """Текущий TraceRecorder или None, если трассировка выключена"""
+    return _tracer
+
+
+def enable_tracing(capacity=262144):
+    """Включить трассировку (повторный вызов возвращает уже созданный буфер)"""
+    global _tracer
+    if _tracer is None:
+        _tracer = TraceRecorder(capacity)
+    return _tracer
+
+
+def disable_tracing():
+    global _tracer
+    _tracer = None
+
+
+class TraceRecorder:
+    """
+    Кольцевой буфер интервалов
+
+    Каждый интервал — номер имени, поток, начало и длительность (нс) в
+    массивах numpy фиксированного размера; при переполнении старые записи
+    перезаписываются. Номер слота выдаёт itertools.count, next() которого
+    атомарен, поэтому писать можно из любых потоков без блокировок.
+    """
+
+    def __init__(self, capacity=262144):
+        """
+        Args:
+            capacity: Сколько последних интервалов хранить
+        """
+        self.capacity = capacity
+        self._names = []
+        self._name_ids = {}
+        self._thread_names = {}
+        self._counter = itertools.count()
+        self._name = np.zeros(capacity, dtype=np.int32)
+        self._tid = np.zeros(capacity, dtype=np.int64)
+        self._start = np.zeros(capacity, dtype=np.int64)
+        self._duration = np.zeros(capacity, dtype=np.int64)
+        self._written = np.zeros(capacity, dtype=bool)
+
+    def name_id(self, name):
+        """Номер имени интервала (регистрируется один раз, затем используется в add)"""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return name_id
+
+    def add(self, name_id, start_ns, end_ns=None):
+        """
+        Записать интервал
+
+        Args:
+            name_id: Номер из name_id()
+            start_ns: Начало (perf_counter_ns)
+            end_ns: Конец (по умолчанию — текущий момент)
+        """
+        if end_ns is None:
+            end_ns = time.perf_counter_ns()
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        i = next(self._counter) % self.capacity
+        self._name[i] = name_id
+        self._tid[i] = tid
+        self._start[i] = start_ns
+        self._duration[i] = end_ns - start_ns
+        self._written[i] = True
+
+    def to_chrome_trace(self):
+        """
+        Returns:
+            dict: {"traceEvents": [...]} в формате Chrome trace-event
+        """
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self._thread_names.items()
+        ]
+        names = self._names
+        written = np.flatnonzero(self._written)
+        for i in written[np.argsort(self._start[written], kind="stable")]:
+            events.append({
+                "name": names[self._name[i]],
+                "ph": "X",
+                "pid": pid,
+                "tid": int(self._tid[i]),
+                "ts": int(self._start[i]) / 1000,
+                "dur": int(self._duration[i]) / 1000,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path):
+        """Сохранить трассу в JSON"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        print(f"[Trace] Трасса сохранена: {path} ({int(self._written.sum())} интервалов)")